@@ -1,47 +1,65 @@
-import fastf1
-from fastf1 import plotting
 import numpy as np
-import pandas as pd
 import os
-from scipy.interpolate import interp1d
 from flask import Flask, render_template, request, jsonify
+import click
 import json
+import hmac
+import uuid
 import logging
-from datetime import timedelta
+from datetime import datetime, timedelta
+from fastf1_setup import FASTF1_CACHE_DIR
+from session_cache import session_cache, NEEDS_DRIVERS, NEEDS_LAPS, NEEDS_TELEMETRY
+from telemetry_store import TelemetryStore, TELEMETRY_STORE_EXPORT_ON_LOAD
+from track_geometry import TrackGeometryStore, circuit_markers, GEOMETRY_LEVELS, DEFAULT_LEVEL
+from dominance import compute_minisector_dominance, minisector_winners, MINISECTOR_COUNT, MAX_MINISECTORS
+from resampling import resample_by_distance, downsample, cumulative_deltas, stack_grids, matrix_deltas, shared_indices, clamp_point_budget, DEFAULT_POINT_BUDGET, DOWNSAMPLE_METHODS
+from result_store import ResultStore
+from parallel import driver_executor
+from availability import SessionIndex
+from jobs import job_manager, JobQueueFull
+from frames import encode_analysis_frames, FRAMES_MIMETYPE, CHANNEL_DTYPES
+from json_provider import NumpyJSONProvider
+from http_cache import make_etag, apply_cache_headers, not_modified, compress_response
+from lap_index import session_lap_index, select_lap_numbers, parse_lap_selection, NoLapsSelected
+from season import season_executor, summarise_season, SEASON_MAX_DRIVERS
+from race_pace import session_race_pace
+from sector_metrics import session_sector_metrics
+from profiling import sampling_profiler, ProfileStore, PROFILE_SECRET, PROFILE_SLOW_MS, PROFILE_HEADER
+from memory import memory_accountant
+from metrics import span, register_collector, begin_request, end_request, server_timing, render as render_metrics, PROMETHEUS_CONTENT_TYPE
+from warmup import WarmupJob, WARMUP_ON_STARTUP, WARMUP_CONCURRENCY, WARMUP_TARGETS, WARMUP_YEARS, parse_targets, parse_years, start_background_warmup
 
 # Setup logging
 logging.basicConfig(level=logging.DEBUG)
 
-def convert_numpy_types(obj):
-    """Convert numpy types to native Python types for JSON serialization"""
-    if isinstance(obj, np.integer):
-        return int(obj)
-    elif isinstance(obj, np.floating):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, dict):
-        return {key: convert_numpy_types(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_numpy_types(item) for item in obj]
-    return obj
-
 app = Flask(__name__)
+# NumPy/pandas-aware JSON (orjson when installed), so results are returned straight from arrays
+app.json = NumpyJSONProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET", "track_lytix_secret_key")
 
-# Cache setup for fastf1
-cache_dir = os.path.join(os.getcwd(), 'fastf1_cache')
+# FastF1 itself is imported and its cache enabled on first use (fastf1_setup.get_fastf1)
+cache_dir = FASTF1_CACHE_DIR
 os.makedirs(cache_dir, exist_ok=True)
 
-try:
-    fastf1.Cache.enable_cache(cache_dir)
-    plotting.setup_mpl(color_scheme=None)
-    logging.info(f"FastF1 cache enabled at: {cache_dir}")
-except Exception as e:
-    logging.warning(f"Cache setup failed: {e}")
-    plotting.setup_mpl(color_scheme=None)
+# Derived-result store for processed telemetry; bump PROCESSING_VERSION when outputs change
+PROCESSING_VERSION = 7
+RESULT_STORE_LIVE_TTL = int(os.environ.get("RESULT_STORE_LIVE_TTL", 6 * 3600))
+result_store = ResultStore(os.environ.get("RESULT_STORE_PATH", os.path.join(cache_dir, 'derived_results.sqlite')))
+
+# Columnar per-lap telemetry exported from loaded sessions, memory-mapped by every worker
+telemetry_store = TelemetryStore(os.environ.get("TELEMETRY_STORE_PATH", os.path.join(cache_dir, 'telemetry')))
+
+# Circuit outlines and corner positions, built once per circuit layout and served by /track_geometry
+track_geometry_store = TrackGeometryStore(os.environ.get("TRACK_GEOMETRY_PATH", os.path.join(cache_dir, 'geometry')))
+
+# Request profiles captured on demand (X-Profile header) or for slow requests
+profile_store = ProfileStore(os.environ.get("PROFILE_DIR", os.path.join(cache_dir, 'profiles')))
+
+# Per-season session availability, answered from memory by /get_sessions
+session_index = SessionIndex(os.environ.get("SESSION_INDEX_PATH", os.path.join(cache_dir, 'session_index.json')))
 
 # Data constants
+FIELD_SELECTION = 'all'  # "drivers": "all" analyses the whole field in one batched pass
 years = list(range(2025, 2017, -1))
 sessions = ['Race', 'Qualifying', 'FP1', 'FP2', 'FP3', 'Sprint', 'Sprint Qualifying']
 
@@ -137,117 +155,35 @@ def get_driver_team(driver):
     }
     return driver_teams.get(driver, 'Unknown')
 
-def get_available_sessions(year, grand_prix):
-    """Get available sessions for a specific Grand Prix and year with enhanced reliability"""
+def get_session_code(session_name):
+    """Map a session display name to the FastF1 session identifier"""
+    if session_name == 'Race':
+        return 'R'
+    elif session_name == 'Qualifying':
+        return 'Q'
+    return session_name
+
+def lookup_available_sessions(year, grand_prix):
+    """Available sessions for a Grand Prix and whether they came from a complete index entry
+
+    Falls back to Race and Qualifying (not complete) when nothing is known.
+    """
     try:
-        available_sessions = []
-        session_mapping = {
-            'Race': 'R',
-            'Qualifying': 'Q',
-            'FP1': 'FP1',
-            'FP2': 'FP2', 
-            'FP3': 'FP3',
-            'Sprint': 'S',
-            'Sprint Qualifying': 'SQ'
-        }
-        
-        for session_name, session_code in session_mapping.items():
-            try:
-                session = fastf1.get_session(year, grand_prix, session_code)
-                # Quick validation without full load
-                session_info = session.get_session_info()
-                if session_info is not None and len(session_info) > 0:
-                    available_sessions.append(session_name)
-                    logging.debug(f"Session {session_name} available for {grand_prix} {year}")
-            except Exception as e:
-                logging.debug(f"Session {session_name} not available: {str(e)[:100]}")
-                continue
+        available_sessions, complete = session_index.lookup(year, grand_prix)
         
         # Ensure basic sessions are always available as fallback
         if not available_sessions:
-            available_sessions = ['Race', 'Qualifying']
             logging.warning(f"No sessions found for {grand_prix} {year}, using fallback")
+            return ['Race', 'Qualifying'], False
         
-        # Sort sessions in logical order
-        session_order = ['FP1', 'FP2', 'FP3', 'Sprint Qualifying', 'Sprint', 'Qualifying', 'Race']
-        available_sessions.sort(key=lambda x: session_order.index(x) if x in session_order else 999)
-        
-        return available_sessions
+        return available_sessions, complete
     except Exception as e:
         logging.error(f"Error getting available sessions: {e}")
-        return ['Race', 'Qualifying']
-
-def interpolate_track(X, Y, num_points=2000):
-    """Interpolate track coordinates for smoother visualization"""
-    mask = ~(np.isnan(X) | np.isnan(Y))
-    X = X[mask]
-    Y = Y[mask]
-    dist = np.sqrt(np.diff(X)**2 + np.diff(Y)**2)
-    cumdist = np.insert(np.cumsum(dist), 0, 0)
-    fx = interp1d(cumdist, X, kind='cubic')
-    fy = interp1d(cumdist, Y, kind='cubic')
-    uniform_dist = np.linspace(cumdist[0], cumdist[-1], num_points)
-    X_new = fx(uniform_dist)
-    Y_new = fy(uniform_dist)
-    return X_new, Y_new, uniform_dist
-
-def calculate_consistency_score(lap_times):
-    """Calculate consistency score based on lap time standard deviation"""
-    if len(lap_times) < 2:
-        return 0.0, 0.0
-    
-    # Convert lap times to seconds
-    times_seconds = [lt.total_seconds() for lt in lap_times if pd.notna(lt)]
-    if len(times_seconds) < 2:
-        return 0.0, 0.0
-    
-    std_dev = np.std(times_seconds)
-    mean_time = np.mean(times_seconds)
-    consistency_score = max(0, 100 - (std_dev / mean_time * 100))
-    
-    return consistency_score, std_dev
-
-def calculate_tyre_efficiency(lap_times, compound="Unknown"):
-    """Calculate tyre efficiency score"""
-    if len(lap_times) < 3:
-        return 0.0, compound
-    
-    # Simple efficiency based on lap time degradation
-    try:
-        first_half = lap_times[:len(lap_times)//2]
-        second_half = lap_times[len(lap_times)//2:]
-        
-        avg_first = np.mean([t.total_seconds() for t in first_half if pd.notna(t)])
-        avg_second = np.mean([t.total_seconds() for t in second_half if pd.notna(t)])
-        
-        if avg_first > 0:
-            degradation = ((avg_second - avg_first) / avg_first) * 100
-            efficiency = max(0, 100 - abs(degradation))
-            return efficiency, compound
-    except:
-        pass
-    
-    return 85.0, compound  # Default efficiency
+        return ['Race', 'Qualifying'], False
 
-def calculate_theoretical_best(session, driver):
-    """Calculate theoretical best lap time from best sectors"""
-    try:
-        laps = session.laps.pick_drivers(driver)
-        if laps.empty:
-            return None, [None, None, None]
-        
-        # Get best sector times
-        best_s1 = laps['Sector1Time'].min()
-        best_s2 = laps['Sector2Time'].min()
-        best_s3 = laps['Sector3Time'].min()
-        
-        if pd.isna(best_s1) or pd.isna(best_s2) or pd.isna(best_s3):
-            return None, [best_s1, best_s2, best_s3]
-        
-        theoretical_best = best_s1 + best_s2 + best_s3
-        return theoretical_best, [best_s1, best_s2, best_s3]
-    except:
-        return None, [None, None, None]
+def get_available_sessions(year, grand_prix):
+    """Get available sessions for a specific Grand Prix and year from the availability index"""
+    return lookup_available_sessions(year, grand_prix)[0]
 
 def analyze_gear_strategy(telemetry):
     """Analyze gear usage strategy"""
@@ -276,292 +212,794 @@ def analyze_gear_strategy(telemetry):
             'max_gear': 0
         }
 
-def find_strongest_sector(session, driver):
-    """Find driver's strongest sector compared to session average"""
+def get_session_drivers(year, grand_prix, session_name):
+    """Sorted driver abbreviations for a session"""
+    import pandas as pd
+    # Driver info is part of every load, so skip laps and telemetry entirely
+    session = session_cache.get(year, grand_prix, get_session_code(session_name), needs=NEEDS_DRIVERS)
+    
+    drivers = session.results['Abbreviation'].unique().tolist()
+    drivers = [d for d in drivers if pd.notna(d) and d != '']
+    drivers.sort()
+    return drivers
+
+def format_lap_time(lap_time):
+    """Format a lap time Timedelta as M:SS.mmm"""
+    import pandas as pd
+    if pd.isna(lap_time):
+        return "N/A"
+    return f"{int(lap_time.total_seconds() // 60)}:{int(lap_time.total_seconds() % 60):02}.{int((lap_time.total_seconds() * 1000) % 1000):03}"
+
+def result_max_age(year):
+    """Seconds a stored result stays valid; past seasons never change"""
+    if int(year) < datetime.now().year:
+        return None
+    return RESULT_STORE_LIVE_TTL
+
+def fastest_lap_channels(fastest_lap, stored=None):
+    """Fastest-lap channels from the exported telemetry store when available, otherwise from FastF1"""
+    if stored is not None:
+        channels = stored.lap(fastest_lap['Driver'], fastest_lap['LapNumber'])
+        if channels is not None:
+            return channels
+
+    # Simplified processing - use raw data with basic interpolation
+    telemetry = fastest_lap.get_telemetry().copy().add_distance()
+    return {
+        'Time': telemetry['Time'].dt.total_seconds().values,
+        'Distance': telemetry['Distance'].values,
+        'X': telemetry['X'].values,
+        'Y': telemetry['Y'].values,
+        'Speed': telemetry['Speed'].values,
+        'Throttle': telemetry['Throttle'].values,
+        'Brake': telemetry['Brake'].values,
+        'Gear': telemetry['nGear'].values,
+    }
+
+def extract_driver_data(session, driver, stored=None):
+    """Process one driver's fastest lap into a piece that does not depend on the other selected drivers
+
+    stored is an exported SessionTelemetry; when it has the lap, the session
+    only needs laps loaded, not car and position data.
+    """
+    import pandas as pd
+    laps = session.laps.pick_drivers(driver)
+    fastest_lap = laps.pick_fastest()
+    with span('get_telemetry'):
+        telemetry = fastest_lap_channels(fastest_lap, stored)
+
+    # Full-resolution channels for the mini-sector dominance engine (copied out of any memmap)
+    raw_telemetry = {name: np.array(telemetry[name], dtype=float) for name in ('Distance', 'Speed', 'X', 'Y')}
+    
+    # Project the distance-indexed channels onto the shared grid; downsampling happens per request.
+    # Position only feeds dominance and the circuit outline, which is served by /track_geometry
+    with span('resample'):
+        grid_telemetry = resample_by_distance(
+            telemetry['Distance'], {name: telemetry[name] for name in ('Speed', 'Throttle', 'Brake', 'Gear', 'Time')})
+    
+    speed_new = grid_telemetry['Speed']
+    throttle_new = grid_telemetry['Throttle']
+    brake_new = grid_telemetry['Brake']
+    gear_new = grid_telemetry['Gear']
+    
+    piece = {
+        # Channels stay as arrays (Distance in metres); the response encoder picks JSON lists or binary columns
+        'telemetry': grid_telemetry,
+        'raw_telemetry': raw_telemetry,
+        # Enhanced telemetry stats
+        'detailed_telemetry': {
+            'max_speed': float(np.max(speed_new)),
+            'avg_speed': float(np.mean(speed_new)),
+            'max_throttle': float(np.max(throttle_new)),
+            'avg_throttle': float(np.mean(throttle_new)),
+            'brake_points': int(np.sum(brake_new > 10)),
+            'gear_changes': int(np.sum(np.diff(gear_new) != 0)),
+            'max_gear': int(np.max(gear_new))
+        },
+        'lap_time': format_lap_time(fastest_lap['LapTime']),
+        'session_best': None,
+        'advanced_metrics': {},
+        'lap_by_lap': {},
+        'race_pace': None,
+    }
+
+    # Simplified advanced metrics calculation  
     try:
-        laps = session.laps.pick_drivers(driver)
-        if laps.empty:
-            return None, 0.0
+        # Session Best 
+        session_best = fastest_lap['LapTime']
         
-        # Get driver's best sectors
-        driver_s1 = laps['Sector1Time'].min()
-        driver_s2 = laps['Sector2Time'].min()
-        driver_s3 = laps['Sector3Time'].min()
+        # Best sectors, theoretical best and strongest sector come from one per-session aggregation
+        with span('sector_metrics'):
+            sectors = session_sector_metrics(session).get(driver, {})
+        theoretical_best = sectors.get('theoretical_best')
+        if theoretical_best is None and pd.notna(session_best):
+            theoretical_best = session_best.total_seconds()
         
-        # Get session averages
-        all_laps = session.laps
-        session_s1_avg = all_laps['Sector1Time'].mean()
-        session_s2_avg = all_laps['Sector2Time'].mean()
-        session_s3_avg = all_laps['Sector3Time'].mean()
-        
-        if any(pd.isna([driver_s1, driver_s2, driver_s3, session_s1_avg, session_s2_avg, session_s3_avg])):
-            return None, 0.0
+        # Lap-by-lap pace is computed once per session for the whole field
+        with span('race_pace'):
+            pace = session_race_pace(session).get(driver)
+        if pace is not None:
+            piece['lap_by_lap'] = pace['laps']
+            piece['race_pace'] = pace['summary']
+
+        # Basic consistency score using standard deviation of valid lap times
+        if pace is not None and pace['summary']['valid_laps'] > 1:
+            std_dev = pace['summary']['valid_std']
+            consistency_score = max(0, 100 - (std_dev * 10))  # Simple scoring
+        else:
+            consistency_score = 100.0
+            std_dev = 0.0
         
-        # Calculate advantages
-        s1_advantage = (session_s1_avg - driver_s1).total_seconds()
-        s2_advantage = (session_s2_avg - driver_s2).total_seconds()
-        s3_advantage = (session_s3_avg - driver_s3).total_seconds()
+        # Simplified gear strategy
+        gear_strategy = f"Max gear: {int(np.max(gear_new))}"
         
-        advantages = {'S1': s1_advantage, 'S2': s2_advantage, 'S3': s3_advantage}
-        strongest_sector = max(advantages.keys(), key=lambda k: advantages[k])
+        strongest_sector = sectors.get('strongest_sector')
+        sector_advantage = sectors.get('sector_advantage', 0.0)
         
-        return strongest_sector, advantages[strongest_sector]
+        # Grid position (default to None for simplicity)
+        grid_position = None
+
+        if pd.notna(session_best):
+            piece['session_best'] = float(session_best.total_seconds())
+
+        # gap_to_leader depends on the selected drivers and is filled in at assembly
+        piece['advanced_metrics'] = {
+            'session_best': piece['session_best'],
+            'theoretical_best': float(theoretical_best) if theoretical_best else None,
+            'best_sectors': sectors.get('best_sectors', [None, None, None]),
+            'consistency_score': float(consistency_score),
+            'std_dev': float(std_dev),
+            'max_speed': float(np.max(speed_new)),
+            'gear_strategy': gear_strategy,
+            'strongest_sector': strongest_sector,
+            'sector_advantage': float(sector_advantage),
+            'gap_to_session_leader': sectors.get('gap_to_session_leader'),
+            'grid_position': grid_position,
+        }
+            
+    except Exception as e:
+        logging.error(f"Error calculating advanced metrics for {driver}: {e}")
+
+    # Process sector times
+    try:
+        sectors = []
+        if hasattr(fastest_lap, 'Sector1Time') and fastest_lap['Sector1Time'] is not None:
+            sectors.append(f"{fastest_lap['Sector1Time'].total_seconds():.3f}s")
+        if hasattr(fastest_lap, 'Sector2Time') and fastest_lap['Sector2Time'] is not None:
+            sectors.append(f"{fastest_lap['Sector2Time'].total_seconds():.3f}s")
+        if hasattr(fastest_lap, 'Sector3Time') and fastest_lap['Sector3Time'] is not None:
+            sectors.append(f"{fastest_lap['Sector3Time'].total_seconds():.3f}s")
+        piece['sector_times'] = sectors
     except:
-        return None, 0.0
+        piece['sector_times'] = ['N/A', 'N/A', 'N/A']
+
+    return piece
+
+def extraction_session(year, grand_prix, session_code, drivers, stored):
+    """Session for extract_driver_data: laps only when the store holds every driver's fastest lap, else telemetry"""
+    if stored is None:
+        return session_cache.get(year, grand_prix, session_code, needs=NEEDS_TELEMETRY)
+    session = session_cache.get(year, grand_prix, session_code, needs=NEEDS_LAPS)
+    for driver in drivers:
+        try:
+            lap_number = int(session.laps.pick_drivers(driver).pick_fastest()['LapNumber'])
+        except (KeyError, TypeError, ValueError):
+            continue  # no timed lap; extraction reports the driver
+        if not stored.has_lap(driver, lap_number):
+            return session_cache.get(year, grand_prix, session_code, needs=NEEDS_TELEMETRY)
+    return session
+
+def extract_session_driver(year, grand_prix, session_code, driver):
+    """Load (or reuse) the session in this process and extract one driver; entry point for process-pool workers"""
+    stored = telemetry_store.open(year, grand_prix, session_code)
+    session = extraction_session(year, grand_prix, session_code, [driver], stored)
+    return extract_driver_data(session, driver, stored)
+
+def thin_telemetry(grids, reference, points=DEFAULT_POINT_BUDGET, downsample_method='lttb'):
+    """Deltas to the reference trace, then each grid thinned to the point budget; returns (telemetry, track_length)
+
+    grids maps a trace (driver or driver lap) to channels on the shared
+    distance grid, including Time.
+    """
+    # Delta-time vs distance on the full shared grid, before any downsampling
+    with span('deltas'):
+        deltas = cumulative_deltas({trace: grid['Time'] for trace, grid in grids.items()}, reference)
+
+    # Distance becomes a fraction of one shared track length so every trace's samples line up on the same x axis
+    track_length = max(float(grid['Distance'][-1]) for grid in grids.values())
+    telemetry = {}
+    with span('downsample'):
+        for trace, grid in grids.items():
+            channels = downsample(dict(grid, Delta=deltas[trace]), points, downsample_method)
+            channels.pop('Time')
+            telemetry[trace] = dict(channels, Distance=channels['Distance'] / track_length)
+    return telemetry, track_length
+
+def assemble_analysis(pieces, selected_drivers, num_minisectors=MINISECTOR_COUNT,
+                      points=DEFAULT_POINT_BUDGET, downsample_method='lttb', reference=None):
+    """Combine per-driver pieces into the /generate_analysis response
+
+    reference is the driver the delta traces are measured against; it
+    defaults to the fastest of the selected drivers.
+    """
+    driver_colors = {}
+    for driver in selected_drivers:
+        driver_colors[driver] = team_colors.get(get_driver_team(driver), "#DDDDDD")
+
+    # Gap to the fastest of the selected drivers
+    all_drivers_best = {d: pieces[d]['session_best'] for d in selected_drivers if pieces[d]['session_best'] is not None}
+    leader_time = min(all_drivers_best.values()) if all_drivers_best else None
+
+    advanced_metrics = {}
+    for driver in selected_drivers:
+        metrics = dict(pieces[driver]['advanced_metrics'])
+        if metrics:
+            if leader_time is not None and driver in all_drivers_best:
+                metrics['gap_to_leader'] = float(all_drivers_best[driver] - leader_time)
+            else:
+                metrics['gap_to_leader'] = 0.0
+        advanced_metrics[driver] = metrics
+
+    # Process fastest mini-sectors on a common distance grid
+    raw_telemetry = {d: pieces[d]['raw_telemetry'] for d in selected_drivers}
+    with span('dominance'):
+        fastest_minisectors = compute_minisector_dominance(raw_telemetry, driver_colors, num_minisectors)
+
+    if reference not in selected_drivers:
+        reference = min(all_drivers_best, key=all_drivers_best.get) if all_drivers_best else selected_drivers[0]
+
+    telemetry, track_length = thin_telemetry(
+        {d: pieces[d]['telemetry'] for d in selected_drivers}, reference, points, downsample_method)
+
+    result = {
+        'telemetry': telemetry,
+        'track_length': track_length,
+        'delta_reference': reference,
+        'fastest_minisectors': fastest_minisectors,
+        'lap_times': {d: pieces[d]['lap_time'] for d in selected_drivers},
+        'sector_times': {d: pieces[d]['sector_times'] for d in selected_drivers},
+        'driver_colors': driver_colors,
+        'detailed_telemetry': {d: pieces[d]['detailed_telemetry'] for d in selected_drivers},
+        'advanced_metrics': advanced_metrics,
+        'lap_by_lap_data': {d: pieces[d].get('lap_by_lap', {}) for d in selected_drivers},
+        'race_pace': {d: pieces[d].get('race_pace') for d in selected_drivers},
+    }
+    return result
+
+def circuit_geometry_ref(grand_prix, piece, session=None):
+    """Reference to the stored outline of this circuit layout, built from piece's lap on first use
+
+    Corners and marshal sectors need a loaded session; a layout first built
+    without one is completed the next time a session is at hand.
+    """
+    raw = piece['raw_telemetry']
+    try:
+        with span('track_geometry'):
+            markers = (lambda: circuit_markers(session)) if session is not None else None
+            key = track_geometry_store.get_or_build(grand_prix, raw['X'], raw['Y'], raw['Distance'], markers)
+    except Exception as e:
+        logging.error(f"Track geometry unavailable for {grand_prix}: {e}")
+        return None
+    return {'key': key, 'url': f'/track_geometry/{key}', 'levels': list(GEOMETRY_LEVELS), 'default_level': DEFAULT_LEVEL}
+
+def process_lap_comparison(year, grand_prix, session_name, selected_drivers, lap_selection, num_minisectors=MINISECTOR_COUNT,
+                           points=DEFAULT_POINT_BUDGET, downsample_method='lttb', reference=None, progress=None):
+    """Compare arbitrary laps of the selected drivers, e.g. lap N of a race, a driver's best laps or a whole stint
+
+    Every selected lap becomes a trace keyed "<driver>-<lap>" with the same
+    telemetry layout as a fastest-lap analysis. Laps come from the exported
+    telemetry store when available, otherwise from the session's lap index
+    in one batched slice per driver.
+    """
+    import pandas as pd
+    progress = progress or (lambda stage: None)
+    session_code = get_session_code(session_name)
+    max_age = result_max_age(year)
+    kind, argument = lap_selection
+    request_key = (f"laps:{kind}={argument}|{','.join(selected_drivers)}|{num_minisectors}|{points}|"
+                   f"{downsample_method}|{reference or ''}")
+    with span('result_store'):
+        result = result_store.get_analysis(year, grand_prix, session_code, request_key, PROCESSING_VERSION, max_age)
+    if result is not None:
+        return result
+
+    progress('loading session')
+    stored = telemetry_store.open(year, grand_prix, session_code)
+    with span('session_cache'):
+        session = session_cache.get(year, grand_prix, session_code, needs=NEEDS_LAPS)
+
+    selected = {}
+    for driver in selected_drivers:
+        driver_laps = session.laps.pick_drivers(driver)
+        if len(driver_laps):
+            selected[driver] = (driver_laps, select_lap_numbers(driver_laps, lap_selection))
+    if stored is None or any(not stored.has_lap(d, n) for d, (_, numbers) in selected.items() for n in numbers):
+        with span('session_cache'):
+            session = session_cache.get(year, grand_prix, session_code, needs=NEEDS_TELEMETRY)
+        if stored is None and TELEMETRY_STORE_EXPORT_ON_LOAD:
+            telemetry_store.export_in_background(session, year, grand_prix, session_code)
+
+    grids, raw_telemetry, laps_info, driver_colors = {}, {}, {}, {}
+    for driver, (driver_laps, numbers) in selected.items():
+        progress(f'extracting {driver}')
+        with span('get_telemetry'):
+            channels = {n: stored.lap(driver, n) for n in numbers} if stored is not None else {}
+            missing = [n for n in numbers if channels.get(n) is None]
+            if missing:
+                channels.update(session_lap_index(session).laps(driver, missing))
+        lap_rows = {int(row['LapNumber']): row for _, row in driver_laps.iterrows()}
+        color = team_colors.get(get_driver_team(driver), "#DDDDDD")
+        for n in numbers:
+            lap = channels.get(n)
+            if lap is None or len(lap['Distance']) < 2:
+                continue
+            trace = f'{driver}-{n}'
+            with span('resample'):
+                grids[trace] = resample_by_distance(
+                    lap['Distance'], {name: lap[name] for name in ('Speed', 'Throttle', 'Brake', 'Gear', 'Time')})
+            raw_telemetry[trace] = {name: np.array(lap[name], dtype=float) for name in ('Distance', 'Speed', 'X', 'Y')}
+            row = lap_rows[n]
+            lap_time = row['LapTime']
+            laps_info[trace] = {
+                'driver': driver,
+                'lap_number': n,
+                'lap_time': format_lap_time(lap_time),
+                'lap_seconds': float(lap_time.total_seconds()) if pd.notna(lap_time) else None,
+                'stint': int(row['Stint']) if 'Stint' in row and pd.notna(row['Stint']) else None,
+                'compound': row['Compound'] if 'Compound' in row and pd.notna(row['Compound']) else None,
+            }
+            driver_colors[trace] = color
+
+    if not grids:
+        raise NoLapsSelected(f"No laps matched the selection for {', '.join(selected_drivers)}")
+
+    timed = {t: info['lap_seconds'] for t, info in laps_info.items() if info['lap_seconds'] is not None}
+    if reference is not None and reference not in grids:
+        raise NoLapsSelected(f"Reference lap {reference} is not part of the selection")
+    if reference is None:
+        reference = min(timed, key=timed.get) if timed else next(iter(grids))
+
+    progress('computing dominance')
+    with span('assemble'):
+        with span('dominance'):
+            fastest_minisectors = compute_minisector_dominance(raw_telemetry, driver_colors, num_minisectors)
+        telemetry, track_length = thin_telemetry(grids, reference, points, downsample_method)
+    result = {
+        'telemetry': telemetry,
+        'track_length': track_length,
+        'delta_reference': reference,
+        'lap_selection': {kind: list(argument) if kind == 'numbers' else argument},
+        'laps': laps_info,
+        'fastest_minisectors': fastest_minisectors,
+        'driver_colors': driver_colors,
+        'track_geometry': circuit_geometry_ref(grand_prix, {'raw_telemetry': raw_telemetry[reference]}, session),
+    }
+    result_store.put_analysis(year, grand_prix, session_code, request_key, PROCESSING_VERSION, result)
+    return result
+
+def process_field_analysis(year, grand_prix, session_name, num_minisectors=MINISECTOR_COUNT,
+                           points=DEFAULT_POINT_BUDGET, downsample_method='lttb', reference=None, progress=None):
+    """Fastest laps of every driver in the session, analysed together as drivers x distance matrices
+
+    Fastest laps are found with one groupby and read from the telemetry
+    store or the session's lap index; every lap is projected onto the
+    shared grid and stacked, so deltas, stats and downsampling are single
+    array operations over the field and dominance is one bincount pass.
+    Rows are ordered fastest first and every per-driver value in the
+    response is a list aligned with "drivers".
+    """
+    import pandas as pd
+    progress = progress or (lambda stage: None)
+    session_code = get_session_code(session_name)
+    max_age = result_max_age(year)
+    request_key = f"field|{num_minisectors}|{points}|{downsample_method}|{reference or ''}"
+    with span('result_store'):
+        result = result_store.get_analysis(year, grand_prix, session_code, request_key, PROCESSING_VERSION, max_age)
+    if result is not None:
+        return result
+
+    progress('loading session')
+    stored = telemetry_store.open(year, grand_prix, session_code)
+    with span('session_cache'):
+        session = session_cache.get(year, grand_prix, session_code, needs=NEEDS_LAPS)
+
+    laps = session.laps
+    frame = pd.DataFrame({
+        'Driver': laps['Driver'].values,
+        'LapNumber': laps['LapNumber'].values.astype(float),
+        'LapTime': laps['LapTime'].dt.total_seconds().values,
+    }).dropna()
+    if frame.empty:
+        raise ValueError("No timed laps in this session")
+    fastest = frame.loc[frame.groupby('Driver')['LapTime'].idxmin()].sort_values('LapTime', kind='stable')
+    fastest_laps = {row.Driver: int(row.LapNumber) for row in fastest.itertuples()}
+    if reference is not None and reference not in fastest_laps:
+        raise NoLapsSelected(f"Reference driver {reference} has no timed lap in this session")
+
+    if stored is None or any(not stored.has_lap(d, n) for d, n in fastest_laps.items()):
+        with span('session_cache'):
+            session = session_cache.get(year, grand_prix, session_code, needs=NEEDS_TELEMETRY)
+        if stored is None and TELEMETRY_STORE_EXPORT_ON_LOAD:
+            telemetry_store.export_in_background(session, year, grand_prix, session_code)
+
+    progress('extracting field')
+    drivers, grids, raw_telemetry = [], [], {}
+    with span('extract'):
+        for driver, lap_number in fastest_laps.items():
+            lap = stored.lap(driver, lap_number) if stored is not None else None
+            if lap is None:
+                lap = session_lap_index(session).laps(driver, [lap_number]).get(lap_number)
+            if lap is None or len(lap['Distance']) < 2:
+                continue
+            with span('resample'):
+                grids.append(resample_by_distance(
+                    lap['Distance'], {name: lap[name] for name in ('Speed', 'Throttle', 'Brake', 'Gear', 'Time')}))
+            raw_telemetry[driver] = {name: np.array(lap[name], dtype=float) for name in ('Distance', 'Speed', 'X', 'Y')}
+            drivers.append(driver)
+    if not drivers:
+        raise ValueError("No fastest-lap telemetry could be extracted for this session")
+
+    progress('computing dominance')
+    with span('assemble'):
+        distance, matrices, lengths = stack_grids(grids)
+        if reference is not None and reference not in drivers:
+            raise NoLapsSelected(f"Reference driver {reference} has no fastest-lap telemetry in this session")
+        reference_row = drivers.index(reference) if reference is not None else 0
+        with span('deltas'):
+            matrices['Delta'] = matrix_deltas(matrices['Time'], lengths, reference_row)
+
+        valid = np.arange(len(distance))[None, :] < lengths[:, None]
+        speed = np.where(valid, matrices['Speed'], np.nan)
+        throttle = np.where(valid, matrices['Throttle'], np.nan)
+        gear = matrices['Gear']
+        stats = {
+            'max_speed': np.nanmax(speed, axis=1),
+            'avg_speed': np.nanmean(speed, axis=1),
+            'max_throttle': np.nanmax(throttle, axis=1),
+            'avg_throttle': np.nanmean(throttle, axis=1),
+            'brake_points': np.sum((matrices['Brake'] > 10) & valid, axis=1),
+            'gear_changes': np.sum((np.diff(gear, axis=1) != 0) & valid[:, 1:], axis=1),
+            'max_gear': np.max(np.where(valid, gear, 0), axis=1).astype(int),
+        }
+
+        with span('dominance'):
+            found = minisector_winners(raw_telemetry, num_minisectors)
+        dominance = None
+        if found is not None:
+            winner_drivers, winners, winner_speed, bounds = found
+            rows = np.array([drivers.index(d) for d in winner_drivers])
+            dominance = {'winner': rows[winners], 'speed': winner_speed, 'bounds': bounds}
+
+        with span('downsample'):
+            columns = shared_indices(distance, speed, points, downsample_method)
+        track_length = float(distance[-1])
+        # Wire dtypes keep the matrices compact in JSON as well as in binary frames
+        matrix = {name: matrices[name][:, columns].astype(CHANNEL_DTYPES[name])
+                  for name in ('Speed', 'Throttle', 'Brake', 'Gear', 'Delta')}
+        matrix['Distance'] = (distance[columns] / track_length).astype(CHANNEL_DTYPES['Distance'])
+        matrix['valid_columns'] = np.searchsorted(columns, lengths).tolist()
+
+    lap_seconds = fastest.set_index('Driver')['LapTime'].reindex(drivers).values
+    sectors = session_sector_metrics(session)
+    result = {
+        'mode': 'field',
+        'drivers': drivers,
+        'driver_colors': [team_colors.get(get_driver_team(d), "#DDDDDD") for d in drivers],
+        'lap_numbers': [fastest_laps[d] for d in drivers],
+        'lap_times': [format_lap_time(pd.Timedelta(seconds=t)) for t in lap_seconds],
+        'lap_seconds': lap_seconds,
+        'gap_to_leader': lap_seconds - lap_seconds.min(),
+        'best_sectors': [sectors.get(d, {}).get('best_sectors', [None, None, None]) for d in drivers],
+        'theoretical_best': [sectors.get(d, {}).get('theoretical_best') for d in drivers],
+        'detailed_telemetry': stats,
+        'track_length': track_length,
+        'delta_reference': drivers[reference_row],
+        'matrix': matrix,
+        'dominance': dominance,
+        'track_geometry': circuit_geometry_ref(grand_prix, {'raw_telemetry': raw_telemetry[drivers[0]]}, session),
+    }
+    result_store.put_analysis(year, grand_prix, session_code, request_key, PROCESSING_VERSION, result)
+    return result
+
+def process_telemetry_data(year, grand_prix, session_name, selected_drivers, num_minisectors=MINISECTOR_COUNT,
+                           points=DEFAULT_POINT_BUDGET, downsample_method='lttb', reference=None, lap_selection=None,
+                           progress=None):
+    """Enhanced telemetry data processing with comprehensive metrics
 
-def process_telemetry_data(year, grand_prix, session_name, selected_drivers):
-    """Enhanced telemetry data processing with comprehensive metrics"""
+    Per-driver pieces and assembled responses are persisted in the result
+    store, so repeated or overlapping selections only touch FastF1 for
+    drivers that have not been processed yet. progress, if given, is called
+    with a short description as each stage starts. lap_selection (from
+    parse_lap_selection) switches from fastest laps to process_lap_comparison,
+    and selected_drivers == FIELD_SELECTION to process_field_analysis.
+    """
+    if selected_drivers == FIELD_SELECTION:
+        return process_field_analysis(year, grand_prix, session_name, num_minisectors, points, downsample_method,
+                                      reference, progress)
+    if lap_selection is not None:
+        return process_lap_comparison(year, grand_prix, session_name, selected_drivers, lap_selection,
+                                      num_minisectors, points, downsample_method, reference, progress)
+    progress = progress or (lambda stage: None)
     try:
         if not session_name or session_name.strip() == '':
             raise ValueError("Session name is required")
-            
-        # Map session names to codes
-        session_code = session_name
-        if session_name == 'Race':
-            session_code = 'R'
-        elif session_name == 'Qualifying':
-            session_code = 'Q'
-            
-        session = fastf1.get_session(year, grand_prix, session_code)
-        session.load()
-
-        num_minisectors = 20  # Reduced for performance
-        all_telemetry = {}
-        fastest_laps = {}
-        driver_colors = {}
-        detailed_telemetry = {}
-        advanced_metrics = {}
-        lap_by_lap_data = {}
-
-        for driver in selected_drivers:
-            laps = session.laps.pick_drivers(driver)
-            fastest_lap = laps.pick_fastest()
-            telemetry = fastest_lap.get_telemetry().copy()
-            fastest_laps[driver] = fastest_lap
-            
-            # Simplified processing - use raw data with basic interpolation
-            telemetry = telemetry.add_distance()
-            
-            # Sample data points for performance (every 10th point)
-            sample_rate = max(1, len(telemetry) // 500)  # Max 500 points
-            telemetry = telemetry.iloc[::sample_rate]
-            
-            X_new = telemetry['X'].values
-            Y_new = telemetry['Y'].values
-            speed_new = telemetry['Speed'].values
-            throttle_new = telemetry['Throttle'].values
-            brake_new = telemetry['Brake'].values
-            gear_new = telemetry['nGear'].values
-            distance_new = telemetry['Distance'].values / np.max(telemetry['Distance'].values)  # Normalize to 0-1
-            
-            all_telemetry[driver] = {
-                'X': X_new.tolist(),
-                'Y': Y_new.tolist(),
-                'Speed': speed_new.tolist(),
-                'Throttle': throttle_new.tolist(),
-                'Brake': brake_new.tolist(),
-                'Gear': gear_new.tolist(),
-                'Distance': distance_new.tolist(),
-            }
-            
-            # Enhanced telemetry stats
-            detailed_telemetry[driver] = {
-                'max_speed': float(np.max(speed_new)),
-                'avg_speed': float(np.mean(speed_new)),
-                'max_throttle': float(np.max(throttle_new)),
-                'avg_throttle': float(np.mean(throttle_new)),
-                'brake_points': int(np.sum(brake_new > 10)),
-                'gear_changes': int(np.sum(np.diff(gear_new) != 0)),
-                'max_gear': int(np.max(gear_new))
-            }
 
-            # Simplified advanced metrics calculation  
-            try:
-                # Session Best 
-                session_best = fastest_lap['LapTime']
-                
-                # Skip complex theoretical best calculation for performance
-                theoretical_best = session_best  # Simplified fallback
-                best_sectors = [None, None, None]
-                
-                # Basic consistency score using standard deviation of valid lap times
-                driver_laps = session.laps.pick_driver(driver)
-                valid_times = []
-                for _, lap in driver_laps.iterrows():
-                    if pd.notna(lap['LapTime']) and lap['LapTime'].total_seconds() > 0:
-                        valid_times.append(lap['LapTime'].total_seconds())
-                
-                if len(valid_times) > 1:
-                    std_dev = np.std(valid_times)
-                    consistency_score = max(0, 100 - (std_dev * 10))  # Simple scoring
-                else:
-                    consistency_score = 100.0
-                    std_dev = 0.0
-                # Gap to session leader (simplified)
-                try:
-                    all_drivers_best = {}
-                    for d in selected_drivers:
-                        try:
-                            d_laps = session.laps.pick_driver(d)
-                            d_fastest = d_laps.pick_fastest()
-                            if pd.notna(d_fastest['LapTime']):
-                                all_drivers_best[d] = d_fastest['LapTime'].total_seconds()
-                        except:
-                            continue
-                    
-                    if all_drivers_best:
-                        leader_time = min(all_drivers_best.values())
-                        gap_to_leader = session_best.total_seconds() - leader_time
-                    else:
-                        gap_to_leader = 0.0
-                except:
-                    gap_to_leader = 0.0
-                
-                # Simplified gear strategy
-                gear_strategy = f"Max gear: {int(np.max(gear_new))}"
-                
-                # Strongest sector (simplified to sector 1)
-                strongest_sector = 1
-                sector_advantage = 0.0
-                
-                # Grid position (default to None for simplicity)
-                grid_position = None
-
-                advanced_metrics[driver] = {
-                    'session_best': float(session_best.total_seconds()) if pd.notna(session_best) else None,
-                    'theoretical_best': float(theoretical_best.total_seconds()) if theoretical_best else None,
-                    'best_sectors': [None, None, None],  # Simplified
-                    'consistency_score': float(consistency_score),
-                    'std_dev': float(std_dev),
-                    'max_speed': float(np.max(speed_new)),
-                    'gear_strategy': gear_strategy,
-                    'strongest_sector': str(strongest_sector),
-                    'sector_advantage': float(sector_advantage),
-                    'grid_position': grid_position,
-                    'gap_to_leader': float(gap_to_leader)
-                }
-
-                # Simplified lap by lap data (skip for performance)
-                lap_by_lap_data[driver] = []
-                    
-            except Exception as e:
-                logging.error(f"Error calculating advanced metrics for {driver}: {e}")
-                advanced_metrics[driver] = {}
-
-        # Set driver colors
-        for driver in selected_drivers:
-            driver_colors[driver] = team_colors.get(get_driver_team(driver), "#DDDDDD")
-
-        # Process fastest mini-sectors
-        fastest_minisectors = []
-        mini_sectors = np.linspace(0, 1, num_minisectors)
-        
-        for i in range(num_minisectors - 1):
-            fastest_driver = None
-            fastest_speed = -1
-            fastest_sector_coords = None
-            
-            for driver, tel in all_telemetry.items():
-                mask_indices = []
-                distances = tel['Distance']
-                
-                # Add safety checks to prevent infinite loops
-                if not distances or len(distances) == 0:
-                    continue
-                    
-                min_sector = mini_sectors[i]
-                max_sector = mini_sectors[i+1] if i+1 < len(mini_sectors) else 1.0
-                
-                for j, dist in enumerate(distances):
-                    if isinstance(dist, (int, float)) and min_sector <= dist < max_sector:
-                        mask_indices.append(j)
-                
-                if not mask_indices or len(mask_indices) == 0:
-                    continue
-                
-                try:
-                    sector_speeds = [tel['Speed'][j] for j in mask_indices if j < len(tel['Speed'])]
-                    if not sector_speeds:
-                        continue
-                        
-                    mean_speed = sum(sector_speeds) / len(sector_speeds)
-                    
-                    if mean_speed > fastest_speed:
-                        fastest_speed = mean_speed
-                        fastest_driver = driver
-                        fastest_sector_coords = {
-                            'x': [tel['X'][j] for j in mask_indices if j < len(tel['X'])],
-                            'y': [tel['Y'][j] for j in mask_indices if j < len(tel['Y'])]
-                        }
-                except (IndexError, KeyError, TypeError) as e:
-                    logging.warning(f"Error processing sector data for {driver}: {e}")
-                    continue
-            
-            if (fastest_sector_coords and fastest_driver and 
-                fastest_driver in driver_colors and 
-                fastest_sector_coords.get('x') and fastest_sector_coords.get('y')):
-                fastest_minisectors.append({
-                    'driver': fastest_driver,
-                    'color': driver_colors[fastest_driver],
-                    'coords': fastest_sector_coords,
-                    'speed': float(fastest_speed)
-                })
-
-        # Process sector times
-        sector_times = {}
-        try:
+        session_code = get_session_code(session_name)
+        max_age = result_max_age(year)
+        request_key = f"{','.join(selected_drivers)}|{num_minisectors}|{points}|{downsample_method}|{reference or ''}"
+
+        with span('result_store'):
+            result = result_store.get_analysis(year, grand_prix, session_code, request_key, PROCESSING_VERSION, max_age)
+            if result is not None:
+                return result
+
+            pieces = {}
+            missing_drivers = []
             for driver in selected_drivers:
-                lap = fastest_laps[driver]
-                sectors = []
-                if hasattr(lap, 'Sector1Time') and lap['Sector1Time'] is not None:
-                    sectors.append(f"{lap['Sector1Time'].total_seconds():.3f}s")
-                if hasattr(lap, 'Sector2Time') and lap['Sector2Time'] is not None:
-                    sectors.append(f"{lap['Sector2Time'].total_seconds():.3f}s")
-                if hasattr(lap, 'Sector3Time') and lap['Sector3Time'] is not None:
-                    sectors.append(f"{lap['Sector3Time'].total_seconds():.3f}s")
-                sector_times[driver] = sectors
-        except:
-            sector_times = {driver: ['N/A', 'N/A', 'N/A'] for driver in selected_drivers}
-
-        # Process lap times
-        lap_times = {}
-        for driver, lap in fastest_laps.items():
-            lap_time = lap['LapTime']
-            if pd.notna(lap_time):
-                lap_time_str = f"{int(lap_time.total_seconds() // 60)}:{int(lap_time.total_seconds() % 60):02}.{int((lap_time.total_seconds() * 1000) % 1000):03}"
+                piece = result_store.get_driver(year, grand_prix, session_code, driver, PROCESSING_VERSION, max_age)
+                if piece is not None:
+                    pieces[driver] = piece
+                else:
+                    missing_drivers.append(driver)
+
+        failed_drivers = {}
+        session = None
+        if missing_drivers:
+            progress('loading session')
+            if driver_executor.kind == 'process':
+                # Workers load the session from the FastF1 cache in their own process
+                with span('extract'):
+                    extracted, failed_drivers = driver_executor.map(
+                        extract_session_driver, missing_drivers, year, grand_prix, session_code)
             else:
-                lap_time_str = "N/A"
-            lap_times[driver] = lap_time_str
-
-        result = {
-            'telemetry': all_telemetry,
-            'fastest_minisectors': fastest_minisectors,
-            'lap_times': lap_times,
-            'sector_times': sector_times,
-            'driver_colors': driver_colors,
-            'detailed_telemetry': detailed_telemetry,
-            'advanced_metrics': advanced_metrics,
-            'lap_by_lap_data': lap_by_lap_data
-        }
-        
-        # Convert all numpy types to native Python types for JSON serialization
-        return convert_numpy_types(result)
+                # Fastest-lap telemetry and lap times only; weather and race control messages are unused.
+                # Exported sessions serve telemetry from the memory-mapped store, so only laps are loaded
+                stored = telemetry_store.open(year, grand_prix, session_code)
+                with span('session_cache'):
+                    session = extraction_session(year, grand_prix, session_code, missing_drivers, stored)
+                if stored is None and TELEMETRY_STORE_EXPORT_ON_LOAD:
+                    telemetry_store.export_in_background(session, year, grand_prix, session_code)
+
+                def extract_with_progress(session, driver):
+                    progress(f'extracting {driver}')
+                    return extract_driver_data(session, driver, stored)
+
+                with span('extract'):
+                    extracted, failed_drivers = driver_executor.map(extract_with_progress, missing_drivers, session)
+
+            with span('store'):
+                for driver, piece in extracted.items():
+                    pieces[driver] = piece
+                    result_store.put_driver(year, grand_prix, session_code, driver, PROCESSING_VERSION, piece)
+
+        analysed_drivers = [d for d in selected_drivers if d in pieces]
+        if not analysed_drivers:
+            raise ValueError(f"No telemetry could be extracted for {', '.join(selected_drivers)}")
+
+        progress('computing dominance')
+        with span('assemble'):
+            result = assemble_analysis(pieces, analysed_drivers, num_minisectors, points, downsample_method, reference)
+        result['track_geometry'] = circuit_geometry_ref(grand_prix, pieces[result['delta_reference']], session)
+        if failed_drivers:
+            # Partial results are returned but never persisted
+            result['skipped_drivers'] = failed_drivers
+        else:
+            result_store.put_analysis(year, grand_prix, session_code, request_key, PROCESSING_VERSION, result)
+        return result
 
     except Exception as e:
         logging.error(f"Error processing telemetry data: {e}")
         raise e
 
+def warm_session(year, grand_prix, session_name):
+    """Populate the FastF1 cache, the result store and the telemetry store for every driver of a session"""
+    session_code = get_session_code(session_name)
+    max_age = result_max_age(year)
+    drivers = get_session_drivers(year, grand_prix, session_name)
+    missing_drivers = [
+        d for d in drivers
+        if result_store.get_driver(year, grand_prix, session_code, d, PROCESSING_VERSION, max_age) is None
+    ]
+    if not missing_drivers and telemetry_store.has_session(year, grand_prix, session_code):
+        return f"{len(drivers)} drivers already cached"
+
+    session = None
+    if driver_executor.kind == 'process':
+        # Workers load the session from the FastF1 cache in their own process instead of receiving it pickled
+        extracted, failed_drivers = driver_executor.map(
+            extract_session_driver, missing_drivers, year, grand_prix, session_code)
+    else:
+        session = session_cache.get(year, grand_prix, session_code, needs=NEEDS_TELEMETRY)
+        extracted, failed_drivers = driver_executor.map(extract_driver_data, missing_drivers, session)
+    for driver, piece in extracted.items():
+        result_store.put_driver(year, grand_prix, session_code, driver, PROCESSING_VERSION, piece)
+    if extracted:
+        circuit_geometry_ref(grand_prix, next(iter(extracted.values())), session)
+    try:
+        if not telemetry_store.has_session(year, grand_prix, session_code):
+            if session is None:
+                session = session_cache.get(year, grand_prix, session_code, needs=NEEDS_TELEMETRY)
+            telemetry_store.export(session, year, grand_prix, session_code)
+    except Exception as e:
+        logging.error(f"Telemetry export failed for {grand_prix} {session_name}: {e}")
+    if failed_drivers:
+        raise RuntimeError(f"extraction failed for {', '.join(failed_drivers)}")
+    return f"{len(extracted)} drivers processed"
+
+def build_warmup_targets(target_years=None, targets_spec=''):
+    """Explicit targets if configured, otherwise every available session of the given seasons"""
+    if targets_spec:
+        return parse_targets(targets_spec)
+    targets = []
+    for year in target_years or []:
+        for grand_prix in grand_prix_calendar.get(year, []):
+            for session_name in get_available_sessions(year, grand_prix):
+                targets.append((year, grand_prix, session_name))
+    return targets
+
+warmup_job = None
+
+@app.cli.command('warmup')
+@click.option('--year', 'target_years', type=int, multiple=True, help='Season to warm (repeatable)')
+@click.option('--target', 'target_entries', multiple=True, help="'year|Grand Prix|Session' (repeatable)")
+@click.option('--concurrency', default=WARMUP_CONCURRENCY, show_default=True, help='Sessions warmed in parallel')
+def warmup_command(target_years, target_entries, concurrency):
+    """Warm the FastF1 cache and result store ahead of traffic"""
+    targets = build_warmup_targets(
+        list(target_years) or parse_years(WARMUP_YEARS),
+        ';'.join(target_entries) or WARMUP_TARGETS
+    )
+    if not targets:
+        raise click.UsageError('No targets: pass --year/--target or set WARMUP_YEARS/WARMUP_TARGETS')
+    progress = WarmupJob(targets, warm_session, concurrency).run(on_progress=click.echo)
+    click.echo(f"Done: {progress['completed'] - len(progress['failed'])}/{progress['total']} sessions warmed")
+
+if WARMUP_ON_STARTUP:
+    try:
+        warmup_job = WarmupJob(lambda: build_warmup_targets(parse_years(WARMUP_YEARS), WARMUP_TARGETS), warm_session)
+        start_background_warmup(warmup_job, os.path.join(cache_dir, 'warmup.lock'))
+    except Exception as e:
+        logging.error(f"Could not start warm-up: {e}")
+
+@app.before_request
+def start_request_timing():
+    begin_request(request.endpoint)
+
+@app.after_request
+def add_server_timing(response):
+    timing = server_timing()
+    if timing:
+        response.headers['Server-Timing'] = timing
+    request.environ['tracklytix.status'] = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_timing(exc):
+    # Runs even when a view raised, so the in-flight gauge never leaks
+    end_request(request.environ.get('tracklytix.status', 500))
+
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")  # X-Admin-Token value for /admin endpoints; empty disables them
+
+def admin_authorized():
+    """True when the request carries the configured admin token"""
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(supplied, ADMIN_TOKEN)
+
+def profile_authorized():
+    """True when the request carries the configured profiling secret"""
+    supplied = request.headers.get(PROFILE_HEADER, '')
+    return bool(PROFILE_SECRET) and hmac.compare_digest(supplied, PROFILE_SECRET)
+
+@app.before_request
+def start_profiling():
+    request_id = request.headers.get('X-Request-ID', '')
+    request.environ['tracklytix.request_id'] = request_id if request_id.isalnum() and len(request_id) <= 64 else uuid.uuid4().hex
+    forced = profile_authorized() and request.endpoint not in ('list_profiles', 'get_profile')
+    if forced or PROFILE_SLOW_MS > 0:
+        request.environ['tracklytix.profile'] = (sampling_profiler.start(), forced)
+
+@app.after_request
+def finish_profiling(response):
+    request_id = request.environ['tracklytix.request_id']
+    response.headers['X-Request-ID'] = request_id
+    profile = request.environ.pop('tracklytix.profile', None)
+    if profile is not None:
+        capture, forced = profile
+        sampling_profiler.stop(capture)
+        if forced or capture.duration_ms >= PROFILE_SLOW_MS:
+            # Profile ids are generated here; the client-supplied request id is only metadata
+            profile_id = uuid.uuid4().hex
+            try:
+                profile_store.save(profile_id, capture, request_id=request_id, path=request.path,
+                                   method=request.method, status=response.status_code,
+                                   reason='requested' if forced else 'slow')
+                response.headers['X-Profile-Id'] = profile_id
+            except OSError as e:
+                logging.error(f"Could not save profile {profile_id} for request {request_id}: {e}")
+    return response
+
+@app.teardown_request
+def discard_profiling(exc):
+    # A view that raised skips after_request; stop sampling its thread anyway
+    profile = request.environ.pop('tracklytix.profile', None)
+    if profile is not None:
+        sampling_profiler.stop(profile[0])
+
+@app.after_request
+def compress(response):
+    return compress_response(request, response)
+
+@app.route('/profiles')
+def list_profiles():
+    """Stored request profiles, newest first (requires the profiling secret)"""
+    if not profile_authorized():
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(profile_store.list())
+
+@app.route('/profiles/<profile_id>')
+def get_profile(profile_id):
+    """Folded stacks of one profile, ready for flamegraph.pl or speedscope"""
+    if not profile_authorized():
+        return jsonify({'error': 'Not found'}), 404
+    folded = profile_store.folded(profile_id)
+    if folded is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return app.response_class(folded, mimetype='text/plain')
+
+@register_collector
+def cache_metrics():
+    """Session cache, result store and job pool counters read at scrape time"""
+    cache = session_cache.stats()
+    store = result_store.stats()
+    samples = [
+        ('tracklytix_session_cache_hits_total', 'counter', 'Session cache hits', {}, cache['hits']),
+        ('tracklytix_session_cache_misses_total', 'counter', 'Session cache misses', {}, cache['misses']),
+        ('tracklytix_session_cache_evictions_total', 'counter', 'Session cache evictions', {}, cache['evictions']),
+        ('tracklytix_session_cache_entries', 'gauge', 'Sessions held in memory', {}, cache['entries']),
+        ('tracklytix_session_cache_bytes', 'gauge', 'Estimated memory held by cached sessions', {}, cache['bytes']),
+        ('tracklytix_result_store_hits_total', 'counter', 'Result store hits', {}, store['hits']),
+        ('tracklytix_result_store_misses_total', 'counter', 'Result store misses', {}, store['misses']),
+    ]
+    for status, count in job_manager.stats().items():
+        samples.append(('tracklytix_jobs', 'gauge', 'Analysis jobs by status', {'status': status}, count))
+    for name, cache in memory_accountant.usage()['caches'].items():
+        samples.append(('tracklytix_cache_bytes', 'gauge', 'Estimated memory held per cache', {'cache': name}, cache['bytes']))
+    samples.append(('tracklytix_memory_evictions_total', 'counter', 'Entries evicted for the global memory budget', {},
+                    memory_accountant.evictions))
+    return samples
+
+@app.route('/admin/memory')
+def admin_memory():
+    """Memory held by each in-process cache, per entry, against MEMORY_BUDGET_MB (requires ADMIN_TOKEN)"""
+    if not admin_authorized():
+        return jsonify({'error': 'Not found'}), 404
+    usage = memory_accountant.usage()
+    usage['telemetry_store'] = telemetry_store.stats()
+    return jsonify(usage)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of latency histograms, cache counters and in-flight requests"""
+    return app.response_class(render_metrics(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.route('/')
 def index():
     """Main page"""
     return render_template('index.html', years=years, sessions=sessions)
 
+def is_live_season(year):
+    """True when a season's data can still change, so HTTP caches must revalidate"""
+    return year is None or result_max_age(year) is not None
+
 @app.route('/get_grand_prix')
 def get_grand_prix():
     """Get Grand Prix list for selected year"""
     year = request.args.get('year', type=int)
     if year in grand_prix_calendar:
-        return jsonify(grand_prix_calendar[year])
+        live = is_live_season(year)
+        etag = make_etag('grand_prix', year, *grand_prix_calendar[year])
+        return not_modified(request, app.response_class, etag, live) or \
+            apply_cache_headers(jsonify(grand_prix_calendar[year]), etag, live)
     return jsonify([])
 
 @app.route('/get_sessions')
@@ -571,8 +1009,17 @@ def get_sessions():
     grand_prix = request.args.get('grand_prix')
     
     if year and grand_prix:
-        available_sessions = get_available_sessions(year, grand_prix)
-        return jsonify(available_sessions)
+        available_sessions, complete = lookup_available_sessions(year, grand_prix)
+        if not complete:
+            # A fallback or partial answer must not be cached, let alone as immutable
+            response = jsonify(available_sessions)
+            response.cache_control.no_store = True
+            return response
+        # Availability is answered from memory, so the tag can come from the answer itself
+        live = is_live_season(year)
+        etag = make_etag('sessions', year, grand_prix, *available_sessions)
+        return not_modified(request, app.response_class, etag, live) or \
+            apply_cache_headers(jsonify(available_sessions), etag, live)
     return jsonify([])
 
 @app.route('/get_drivers')
@@ -583,46 +1030,281 @@ def get_drivers():
     session_name = request.args.get('session')
     
     try:
-        session_code = session_name
-        if session_name == 'Race':
-            session_code = 'R'
-        elif session_name == 'Qualifying':
-            session_code = 'Q'
-            
-        session = fastf1.get_session(year, grand_prix, session_code)
-        session.load()
-        
-        drivers = session.laps['Driver'].unique().tolist()
-        drivers = [d for d in drivers if pd.notna(d)]
-        drivers.sort()
-        
-        return jsonify(drivers)
+        # Tagged before loading anything, so a revalidation never touches FastF1
+        live = is_live_season(year)
+        etag = make_etag('drivers', year, grand_prix, session_name, live_ttl=RESULT_STORE_LIVE_TTL if live else None)
+        cached = not_modified(request, app.response_class, etag, live)
+        if cached is not None:
+            return cached
+        drivers = get_session_drivers(year, grand_prix, session_name)
+        if drivers:
+            return apply_cache_headers(jsonify(drivers), etag, live)
     except Exception as e:
         logging.error(f"Error getting drivers: {e}")
-        return jsonify([])
+    # An empty list usually means the session failed to load; never let it be cached
+    response = jsonify([])
+    response.cache_control.no_store = True
+    return response
+
+@app.route('/track_geometry/<key>')
+def track_geometry(key):
+    """Circuit outline at one level of detail, plus corner and marshal-sector positions"""
+    level = request.args.get('lod', DEFAULT_LEVEL)
+    if level not in GEOMETRY_LEVELS:
+        return jsonify({'error': f"lod must be one of {', '.join(GEOMETRY_LEVELS)}"}), 400
+    geometry = track_geometry_store.level(key, level)
+    if geometry is None:
+        return jsonify({'error': 'Unknown track geometry'}), 404
+    return jsonify(geometry)
+
+def analysis_mimetype():
+    """Response format for an analysis: binary typed-array frames when the client prefers them, else JSON"""
+    return request.accept_mimetypes.best_match(['application/json', FRAMES_MIMETYPE]) or 'application/json'
+
+def make_analysis_response(result, etag=None, live=True):
+    """Return an analysis as JSON or binary frames; with an etag, complete results also get HTTP cache headers"""
+    with span('serialise'):
+        if analysis_mimetype() == FRAMES_MIMETYPE:
+            response = app.response_class(encode_analysis_frames(result, app.json.dumps_bytes), mimetype=FRAMES_MIMETYPE)
+        else:
+            response = jsonify(result)
+    response.vary.add('Accept')
+    if etag is not None and 'skipped_drivers' not in result:
+        apply_cache_headers(response, etag, live)
+    return response
+
+def analysis_request_from_args(args):
+    """Build a /generate_analysis body from GET query parameters
+
+    drivers is comma separated (or "all"); laps is "fastest", "best:5",
+    "stint:2" or "numbers:3,10".
+    """
+    data = {name: args.get(name) for name in ('grand_prix', 'session', 'minisectors', 'points', 'downsample', 'reference')}
+    data['year'] = args.get('year', type=int)
+    drivers = args.get('drivers', '')
+    data['drivers'] = FIELD_SELECTION if drivers == FIELD_SELECTION else [d for d in drivers.split(',') if d]
+    laps = args.get('laps')
+    if laps and ':' in laps:
+        kind, _, value = laps.partition(':')
+        laps = {kind: value.split(',') if kind == 'numbers' else value}
+    data['laps'] = laps
+    return data
+
+def parse_analysis_request(data):
+    """Validate an analysis request body; returns (params, error message)"""
+    if not data:
+        return None, 'Missing required parameters'
+    year = data.get('year')
+    grand_prix = data.get('grand_prix')
+    session = data.get('session')
+    drivers = data.get('drivers', [])
+    
+    if not all([year, grand_prix, session, drivers]):
+        return None, 'Missing required parameters'
+    
+    if drivers != FIELD_SELECTION and (not isinstance(drivers, list) or len(drivers) < 1):
+        return None, 'At least one driver must be selected'
+    if drivers != FIELD_SELECTION and not all(isinstance(d, str) and d for d in drivers):
+        return None, 'Drivers must be given as driver codes'
+    
+    try:
+        # Clamped here so equivalent requests share a request key
+        num_minisectors = int(min(max(int(data.get('minisectors') or MINISECTOR_COUNT), 1), MAX_MINISECTORS))
+        points = clamp_point_budget(data.get('points') or DEFAULT_POINT_BUDGET)
+    except (TypeError, ValueError, OverflowError):
+        return None, 'minisectors and points must be integers'
+    downsample_method = data.get('downsample') or 'lttb'
+    if downsample_method not in DOWNSAMPLE_METHODS:
+        return None, f"Unknown downsample method, expected one of {', '.join(DOWNSAMPLE_METHODS)}"
+    try:
+        lap_selection = parse_lap_selection(data.get('laps'))
+    except ValueError as e:
+        return None, str(e)
+    if drivers == FIELD_SELECTION and lap_selection is not None:
+        return None, 'Lap selection is not supported for whole-field analyses'
+    # Lap comparisons reference a trace ("VER-12"), fastest-lap and field analyses a driver
+    reference = data.get('reference') or None
+    if reference is not None:
+        if not isinstance(reference, str):
+            return None, 'reference must be a driver code'
+        if lap_selection is not None:
+            driver, _, lap_number = reference.rpartition('-')
+            if driver not in drivers or not lap_number.isdigit():
+                return None, 'reference must be a selected lap of a selected driver, e.g. "VER-12"'
+            reference = f'{driver}-{int(lap_number)}'
+        elif drivers != FIELD_SELECTION and reference not in drivers:
+            return None, 'reference must be one of the selected drivers'
+    if drivers != FIELD_SELECTION:
+        drivers = list(drivers)
+    return (year, grand_prix, session, drivers, num_minisectors, points, downsample_method, reference,
+            lap_selection), None
 
 @app.route('/generate_analysis', methods=['POST'])
 def generate_analysis():
-    """Generate comprehensive telemetry analysis"""
+    """Generate comprehensive telemetry analysis
+
+    With "async": true in the body the analysis runs as a background job and
+    the response is 202 with the job id to poll or stream. Jobs only exist in
+    the accepting worker, so callers need a single worker or sticky routing;
+    the dashboard uses the blocking form, which any worker can answer.
+    """
     try:
         data = request.get_json()
-        year = data.get('year')
-        grand_prix = data.get('grand_prix')
-        session = data.get('session')
-        drivers = data.get('drivers', [])
-        
-        if not all([year, grand_prix, session, drivers]):
-            return jsonify({'error': 'Missing required parameters'}), 400
+        params, error = parse_analysis_request(data)
+        if error:
+            return jsonify({'error': error}), 400
         
-        if len(drivers) < 1:
-            return jsonify({'error': 'At least one driver must be selected'}), 400
+        if data.get('async'):
+            year, grand_prix, session, drivers = params[:4]
+            job, created = job_manager.submit(
+                ('analysis', int(year), grand_prix, session, drivers if drivers == FIELD_SELECTION else tuple(drivers))
+                + params[4:],
+                process_telemetry_data, *params
+            )
+            return jsonify({
+                'job_id': job.id,
+                'status': job.status,
+                'coalesced': not created,
+                'status_url': f'/jobs/{job.id}',
+                'result_url': f'/jobs/{job.id}/result',
+                'events_url': f'/jobs/{job.id}/events'
+            }), 202
         
-        result = process_telemetry_data(year, grand_prix, session, drivers)
-        return jsonify(result)
+        result = process_telemetry_data(*params)
+        return make_analysis_response(result)
         
+    except JobQueueFull as e:
+        return jsonify({'error': f'Too many analyses in progress: {e}'}), 429
+    except NoLapsSelected as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         logging.error(f"Error generating analysis: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/generate_analysis', methods=['GET'])
+def generate_analysis_get():
+    """Cacheable form of /generate_analysis for browsers and CDNs, with a deterministic ETag and 304 revalidation"""
+    try:
+        params, error = parse_analysis_request(analysis_request_from_args(request.args))
+        if error:
+            return jsonify({'error': error}), 400
+
+        # The tag identifies the response before any work is done: request key, processing version and format
+        live = is_live_season(params[0])
+        etag = make_etag('analysis', PROCESSING_VERSION, *params, analysis_mimetype(),
+                         live_ttl=RESULT_STORE_LIVE_TTL if live else None)
+        cached = not_modified(request, app.response_class, etag, live)
+        if cached is not None:
+            cached.vary.add('Accept')
+            return cached
+        return make_analysis_response(process_telemetry_data(*params), etag, live)
+
+    except NoLapsSelected as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logging.error(f"Error generating analysis: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Status, progress stages and (once done) result of a background job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/result')
+def get_job_result(job_id):
+    """Result of a finished job in the encoding negotiated via Accept"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': job.error}), 500
+    if job.status != 'done':
+        return jsonify({'error': 'Job not finished', 'status': job.status}), 409
+    return make_analysis_response(job.result)
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-sent events stream of a job's stages, ending with its final status"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    def stream():
+        seen = 0
+        while True:
+            stages, finished = job.wait_for_change(seen, timeout=15)
+            for stage in stages:
+                yield f"event: stage\ndata: {json.dumps(stage)}\n\n"
+            seen += len(stages)
+            if finished:
+                yield f"event: {job.status}\ndata: {json.dumps({'status': job.status, 'error': job.error})}\n\n"
+                return
+            if not stages:
+                # Keep idle connections alive through proxies
+                yield ": keep-alive\n\n"
+
+    return app.response_class(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/season_comparison')
+def season_comparison():
+    """Server-sent events stream of fastest-lap and sector gaps at every round of a season
+
+    Query: year, session (display name, default Qualifying) and drivers
+    (comma separated; gaps are measured to the first). Rounds already in
+    the result store are sent first; the rest load in parallel on the
+    season pool and are sent as each one finishes, followed by a summary.
+    """
+    year = request.args.get('year', type=int)
+    session_name = request.args.get('session', 'Qualifying')
+    drivers = [d.strip().upper() for d in request.args.get('drivers', '').split(',') if d.strip()]
+    if year not in grand_prix_calendar:
+        return jsonify({'error': 'Unknown season'}), 400
+    if session_name not in sessions:
+        return jsonify({'error': f"session must be one of {', '.join(sessions)}"}), 400
+    if not 1 <= len(drivers) <= SEASON_MAX_DRIVERS:
+        return jsonify({'error': f'Select between 1 and {SEASON_MAX_DRIVERS} drivers'}), 400
+
+    session_code = get_session_code(session_name)
+    max_age = result_max_age(year)
+    request_key = f"season|{','.join(drivers)}"
+    calendar = list(enumerate(grand_prix_calendar[year], 1))
+
+    def event(name, payload):
+        return f"event: {name}\ndata: {app.json.dumps(payload)}\n\n"
+
+    def stream():
+        yield event('start', {'year': year, 'session': session_name, 'drivers': drivers, 'rounds': len(calendar)})
+        completed = []
+        pending = []
+        for number, grand_prix in calendar:
+            result = result_store.get_analysis(year, grand_prix, session_code, request_key, PROCESSING_VERSION, max_age)
+            if result is None:
+                pending.append((number, grand_prix))
+                continue
+            completed.append(result)
+            yield event('round', dict(result, round=number, grand_prix=grand_prix))
+
+        for number, grand_prix, result, error in season_executor.compare(year, pending, session_code, drivers):
+            if error is not None:
+                yield event('round_error', {'round': number, 'grand_prix': grand_prix, 'error': error})
+                continue
+            result_store.put_analysis(year, grand_prix, session_code, request_key, PROCESSING_VERSION, result)
+            completed.append(result)
+            yield event('round', dict(result, round=number, grand_prix=grand_prix))
+
+        yield event('done', summarise_season(completed, drivers))
+
+    return app.response_class(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/warmup_status')
+def warmup_status():
+    """Progress of the startup warm-up job in this worker"""
+    if warmup_job is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(warmup_job.progress(), enabled=True))
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import threading
+import logging
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from fastf1_setup import get_fastf1
+
+# Seasons at or after the current year are re-read from the schedule after this many seconds
+SESSION_INDEX_TTL = int(os.environ.get("SESSION_INDEX_TTL", 3600))
+SESSION_PROBE_WORKERS = int(os.environ.get("SESSION_PROBE_WORKERS", 7))
+
+# Display name -> FastF1 identifier used when probing a session directly
+SESSION_PROBE_CODES = {
+    'Race': 'R',
+    'Qualifying': 'Q',
+    'FP1': 'FP1',
+    'FP2': 'FP2',
+    'FP3': 'FP3',
+    'Sprint': 'S',
+    'Sprint Qualifying': 'SQ'
+}
+
+# FastF1 event schedule session names -> display names
+SCHEDULE_SESSION_NAMES = {
+    'Practice 1': 'FP1',
+    'Practice 2': 'FP2',
+    'Practice 3': 'FP3',
+    'Qualifying': 'Qualifying',
+    'Sprint': 'Sprint',
+    'Sprint Qualifying': 'Sprint Qualifying',
+    'Sprint Shootout': 'Sprint Qualifying',
+    'Race': 'Race'
+}
+
+SESSION_ORDER = ['FP1', 'FP2', 'FP3', 'Sprint Qualifying', 'Sprint', 'Qualifying', 'Race']
+
+
+def sort_sessions(session_names):
+    """Sort sessions in logical weekend order"""
+    return sorted(session_names, key=lambda x: SESSION_ORDER.index(x) if x in SESSION_ORDER else 999)
+
+
+def probe_sessions(year, grand_prix, max_workers=SESSION_PROBE_WORKERS):
+    """Check each session type directly via FastF1, probing them concurrently"""
+    def probe(session_name):
+        try:
+            session = get_fastf1().get_session(year, grand_prix, SESSION_PROBE_CODES[session_name])
+            # Quick validation without full load
+            session_info = session.get_session_info()
+            if session_info is not None and len(session_info) > 0:
+                logging.debug(f"Session {session_name} available for {grand_prix} {year}")
+                return session_name
+        except Exception as e:
+            logging.debug(f"Session {session_name} not available: {str(e)[:100]}")
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        found = pool.map(probe, SESSION_PROBE_CODES)
+    return sort_sessions([name for name in found if name])
+
+
+def sessions_from_schedule(year, schedule=None):
+    """Map each event in the season schedule (fetched unless given) to the sessions that have already started"""
+    import pandas as pd
+    if schedule is None:
+        schedule = get_fastf1().get_event_schedule(year, include_testing=False)
+    now = datetime.now(timezone.utc)
+    events = {}
+    for _, event in schedule.iterrows():
+        available = []
+        for i in range(1, 6):
+            name = SCHEDULE_SESSION_NAMES.get(event.get(f'Session{i}'))
+            if name is None:
+                continue
+            session_date = event.get(f'Session{i}DateUtc')
+            if pd.notna(session_date):
+                session_date = pd.Timestamp(session_date)
+                if session_date.tzinfo is None:
+                    session_date = session_date.tz_localize('UTC')
+                if session_date > now:
+                    continue
+            available.append(name)
+        events[event['EventName']] = sort_sessions(available)
+    return events
+
+
+class SessionIndex:
+    """Persisted per-season index of which sessions exist for each Grand Prix
+
+    Seasons are built once from the FastF1 event schedule. Past seasons never
+    expire; the current season is rebuilt after SESSION_INDEX_TTL so new
+    sessions appear once they have run. Events missing from the schedule
+    fall back to concurrent probing and the outcome is indexed as well.
+    """
+
+    def __init__(self, path, ttl=SESSION_INDEX_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()  # guards _seasons and the index file, never held across network calls
+        self._year_locks = {}
+        self._seasons = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return {int(year): season for year, season in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"Could not read session index {self.path}: {e}")
+            return {}
+
+    def _write(self):
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._seasons, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.warning(f"Could not write session index {self.path}: {e}")
+
+    def _is_fresh(self, year, entry):
+        """Complete entries for past seasons never expire; everything else honours the TTL"""
+        if entry.get('complete') and year < datetime.now().year:
+            return True
+        return time.time() - entry['built_at'] < self.ttl
+
+    def _fresh_season(self, year):
+        with self._lock:
+            season = self._seasons.get(year)
+            return season if season is not None and self._is_fresh(year, season) else None
+
+    def _season(self, year):
+        """Return the indexed season, (re)building it from the schedule when missing or stale
+
+        The schedule is fetched under a per-season lock, so other seasons stay
+        readable meanwhile. If the rebuild fails the last good season is kept
+        and the rebuild is retried after the TTL.
+        """
+        season = self._fresh_season(year)
+        if season is not None:
+            return season
+        with self._lock:
+            year_lock = self._year_locks.setdefault(year, threading.Lock())
+        with year_lock:
+            season = self._fresh_season(year)
+            if season is not None:
+                return season
+            try:
+                events = sessions_from_schedule(year)
+            except Exception as e:
+                logging.warning(f"Event schedule unavailable for {year}: {e}")
+                events = None
+            with self._lock:
+                previous = self._seasons.get(year)
+                if events is not None:
+                    season = {'built_at': time.time(), 'complete': True, 'events': events, 'probed': {}}
+                elif previous is not None:
+                    season = dict(previous, built_at=time.time())
+                else:
+                    season = {'built_at': time.time(), 'complete': False, 'events': {}, 'probed': {}}
+                self._seasons[year] = season
+                self._write()
+            return season
+
+    def put_season(self, year, events):
+        """Index a season built from an already fetched schedule, e.g. sessions_from_schedule(year, schedule)"""
+        with self._lock:
+            self._seasons[int(year)] = {'built_at': time.time(), 'complete': True, 'events': events, 'probed': {}}
+            self._write()
+
+    def lookup(self, year, grand_prix):
+        """Return (sorted available sessions, complete) for a Grand Prix
+
+        complete is False when neither the schedule nor probing produced an
+        answer (e.g. while offline), so callers should not cache it.
+        """
+        year = int(year)
+        season = self._season(year)
+        with self._lock:
+            if grand_prix in season['events']:
+                return season['events'][grand_prix], season['complete']
+            probed = season['probed'].get(grand_prix)
+            if probed is not None and self._is_fresh(year, probed):
+                return probed['sessions'], probed['complete']
+
+        sessions_found = probe_sessions(year, grand_prix)
+        with self._lock:
+            self._seasons[year]['probed'][grand_prix] = {
+                'built_at': time.time(),
+                'complete': bool(sessions_found),
+                'sessions': sessions_found
+            }
+            self._write()
+        return sessions_found, bool(sessions_found)
+
+    def get(self, year, grand_prix):
+        """Return the sorted available sessions for a Grand Prix"""
+        return self.lookup(year, grand_prix)[0]
@@ -0,0 +1,361 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Benchmarks must not touch the real result store or session index
+_scratch = tempfile.mkdtemp(prefix='tracklytix-bench-')
+os.environ.setdefault("RESULT_STORE_PATH", os.path.join(_scratch, 'derived_results.sqlite'))
+os.environ.setdefault("SESSION_INDEX_PATH", os.path.join(_scratch, 'session_index.json'))
+os.environ.setdefault("TRACK_GEOMETRY_PATH", os.path.join(_scratch, 'geometry'))
+os.environ.setdefault("TELEMETRY_STORE_PATH", os.path.join(_scratch, 'telemetry'))
+os.environ.setdefault("PROFILE_DIR", os.path.join(_scratch, 'profiles'))
+os.environ["WARMUP_ON_STARTUP"] = "0"
+os.chdir(os.path.dirname(os.path.abspath(__file__)))  # app resolves ./fastf1_cache from the working directory
+
+import app as tracklytix
+from fastf1_setup import get_fastf1
+from availability import sessions_from_schedule
+from dominance import compute_minisector_dominance, MINISECTOR_COUNT
+from frames import encode_analysis_frames
+from race_pace import compute_race_pace
+from resampling import resample_by_distance
+from sector_metrics import compute_sector_metrics
+
+# Recorded fixture checked in under fastf1_cache/: timing data only, no car or position data
+RECORDED_SESSION = (2025, 'Chinese Grand Prix', 'Race')
+# Schedule row for the recorded event (the fixture has no cached schedule); local session start times
+RECORDED_EVENT = {
+    'RoundNumber': 2,
+    'Country': 'China',
+    'Location': 'Shanghai',
+    'OfficialEventName': 'FORMULA 1 HEINEKEN CHINESE GRAND PRIX 2025',
+    'EventDate': '2025-03-23',
+    'EventName': 'Chinese Grand Prix',
+    'EventFormat': 'sprint_qualifying',
+    'F1ApiSupport': True,
+}
+RECORDED_TIMEZONE = 'Asia/Shanghai'
+RECORDED_SESSIONS = [
+    ('Practice 1', '2025-03-21 11:30'),
+    ('Sprint Qualifying', '2025-03-21 15:30'),
+    ('Sprint', '2025-03-22 11:00'),
+    ('Qualifying', '2025-03-22 15:00'),
+    ('Race', '2025-03-23 15:00'),
+]
+# Synthetic sessions are stored under a year the calendar never serves
+SYNTHETIC_SESSION = (2000, 'Benchmark Grand Prix', 'Race')
+DRIVER_COUNTS = (1, 5, 10, 20)
+FIELD = ['VER', 'LAW', 'LEC', 'HAM', 'NOR', 'PIA', 'RUS', 'ANT', 'ALO', 'STR',
+         'GAS', 'DOO', 'OCO', 'BEA', 'TSU', 'HAD', 'ALB', 'SAI', 'HUL', 'BOR']
+RACE_LAPS = 56
+LAP_SAMPLES = 750  # merged car + position samples on a typical fastest lap
+MIN_REGRESSION_MS = 1.0  # ignore slowdowns smaller than timer noise
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 1000))  # worker boot: time to import the app
+
+
+def measure(func, repeat):
+    """Time func() repeat times; the first (cold) run is reported separately"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    warm = timings[1:] or timings
+    return {
+        'first_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(warm), 3),
+        'min_ms': round(min(warm), 3),
+        'max_ms': round(max(warm), 3),
+        'runs': len(timings),
+    }
+
+
+def synthetic_lap(seed, samples=LAP_SAMPLES, lap_time=92.0):
+    """Fastest-lap telemetry for a 5.4 km loop with speed traces that differ per driver"""
+    rng = np.random.default_rng(seed)
+    theta = np.linspace(0, 2 * np.pi, samples)
+    speed = 210 + 85 * np.sin(4 * theta + seed * 0.05) + rng.normal(0, 2.5, samples)
+    time_s = np.linspace(0, lap_time + rng.normal(0, 0.3), samples)
+    distance = np.concatenate([[0.0], np.cumsum(speed[1:] / 3.6 * np.diff(time_s))])
+    return {
+        'Distance': distance,
+        'X': 4200 * np.cos(theta),
+        'Y': 2600 * np.sin(theta),
+        'Speed': speed,
+        'Throttle': np.clip((speed - 120) * 0.8, 0, 100),
+        'Brake': speed < 140,
+        'nGear': np.clip(speed // 40, 1, 8).astype(int),
+        'Time': time_s,
+    }
+
+
+def synthetic_laps(drivers, race_laps=RACE_LAPS):
+    """Lap table with the columns the race pace and sector engines read"""
+    rng = np.random.default_rng(0)
+    rows = []
+    pit_lap = race_laps // 2
+    for i, driver in enumerate(drivers):
+        for lap in range(1, race_laps + 1):
+            stint = 1 if lap <= pit_lap else 2
+            tyre_life = lap if stint == 1 else lap - pit_lap
+            sectors = [27 + i * 0.02 + rng.normal(0, 0.2), 38 + rng.normal(0, 0.2), 27 + tyre_life * 0.02 + rng.normal(0, 0.2)]
+            rows.append({
+                'Driver': driver,
+                'LapNumber': float(lap),
+                'LapTime': pd.Timedelta(seconds=sum(sectors)),
+                'Sector1Time': pd.Timedelta(seconds=sectors[0]),
+                'Sector2Time': pd.Timedelta(seconds=sectors[1]),
+                'Sector3Time': pd.Timedelta(seconds=sectors[2]),
+                'Stint': float(stint),
+                'Compound': 'MEDIUM' if stint == 1 else 'HARD',
+                'TyreLife': float(tyre_life),
+                'PitInTime': pd.Timedelta(seconds=lap * 90) if lap == pit_lap else pd.NaT,
+                'PitOutTime': pd.Timedelta(seconds=lap * 90) if lap == pit_lap + 1 else pd.NaT,
+            })
+    return pd.DataFrame(rows)
+
+
+def synthetic_piece(raw, pace, sectors):
+    """A per-driver piece laid out like extract_driver_data's output"""
+    grid = resample_by_distance(raw['Distance'], {
+        'Speed': raw['Speed'], 'Throttle': raw['Throttle'],
+        'Brake': raw['Brake'], 'Gear': raw['nGear'], 'Time': raw['Time'],
+    })
+    lap_time = float(raw['Time'][-1])
+    return {
+        'telemetry': grid,
+        'raw_telemetry': {k: raw[k] for k in ('Distance', 'Speed', 'X', 'Y')},
+        'detailed_telemetry': {
+            'max_speed': float(np.max(grid['Speed'])),
+            'avg_speed': float(np.mean(grid['Speed'])),
+            'max_throttle': float(np.max(grid['Throttle'])),
+            'avg_throttle': float(np.mean(grid['Throttle'])),
+            'brake_points': int(np.sum(grid['Brake'] > 10)),
+            'gear_changes': int(np.sum(np.diff(grid['Gear']) != 0)),
+            'max_gear': int(np.max(grid['Gear'])),
+        },
+        'lap_time': tracklytix.format_lap_time(pd.Timedelta(seconds=lap_time)),
+        'session_best': lap_time,
+        'advanced_metrics': {'session_best': lap_time, **sectors},
+        'lap_by_lap': pace['laps'],
+        'race_pace': pace['summary'],
+        'sector_times': ['27.000s', '38.000s', '27.000s'],
+    }
+
+
+def bench_startup(results, repeat):
+    """Wall time of a fresh interpreter importing the app, i.e. what each gunicorn worker pays at boot"""
+    code = 'import time; t = time.perf_counter(); import app; print((time.perf_counter() - t) * 1000)'
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                                env=dict(os.environ, WARMUP_ON_STARTUP='0')).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    results['startup.import_app'] = {
+        'first_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'runs': len(timings),
+        'budget_ms': IMPORT_BUDGET_MS,
+    }
+
+
+def bench_synthetic(results, counts, repeat):
+    """Pipeline stages on synthetic fixtures, independent of FastF1 data availability"""
+    laps = synthetic_laps(FIELD)
+    results['synthetic.race_pace[20]'] = measure(lambda: compute_race_pace(laps), repeat)
+    results['synthetic.sector_metrics[20]'] = measure(lambda: compute_sector_metrics(laps), repeat)
+
+    raw = {driver: synthetic_lap(seed) for seed, driver in enumerate(FIELD)}
+    pace = compute_race_pace(laps)
+    sectors = compute_sector_metrics(laps)
+    pieces = {driver: synthetic_piece(raw[driver], pace[driver], sectors[driver]) for driver in FIELD}
+
+    year, grand_prix, session_name = SYNTHETIC_SESSION
+    session_code = tracklytix.get_session_code(session_name)
+    for driver, piece in pieces.items():
+        tracklytix.result_store.put_driver(year, grand_prix, session_code, driver, tracklytix.PROCESSING_VERSION, piece)
+
+    client = tracklytix.app.test_client()
+    for n in counts:
+        drivers = FIELD[:n]
+        selection = {d: pieces[d] for d in drivers}
+        colors = {d: '#FFFFFF' for d in drivers}
+        raw_selection = {d: raw[d] for d in drivers}
+        results[f'synthetic.extract[{n}]'] = measure(
+            lambda: [synthetic_piece(raw[d], pace[d], sectors[d]) for d in drivers], repeat)
+        results[f'synthetic.dominance[{n}]'] = measure(
+            lambda: compute_minisector_dominance(raw_selection, colors, MINISECTOR_COUNT), repeat)
+        results[f'synthetic.assemble[{n}]'] = measure(lambda: tracklytix.assemble_analysis(selection, drivers), repeat)
+
+        analysis = tracklytix.assemble_analysis(selection, drivers)
+        results[f'synthetic.serialise_json[{n}]'] = measure(lambda: tracklytix.app.json.dumps_bytes(analysis), repeat)
+        results[f'synthetic.serialise_frames[{n}]'] = measure(
+            lambda: encode_analysis_frames(analysis, tracklytix.app.json.dumps_bytes), repeat)
+
+        # A new point budget per call forces assembly; repeating one budget hits the stored analysis
+        budgets = iter(range(tracklytix.DEFAULT_POINT_BUDGET + 1, tracklytix.DEFAULT_POINT_BUDGET + 1 + repeat))
+        body = {'year': year, 'grand_prix': grand_prix, 'session': session_name, 'drivers': drivers}
+        results[f'synthetic.round_trip[{n}]'] = measure(
+            lambda: check(client.post('/generate_analysis', json={**body, 'points': next(budgets)})), repeat)
+        results[f'synthetic.round_trip_stored[{n}]'] = measure(
+            lambda: check(client.post('/generate_analysis', json=body)), repeat)
+
+
+def recorded_schedule():
+    """One-event FastF1 schedule for the recorded fixture, built from RECORDED_EVENT"""
+    from fastf1.events import EventSchedule
+    row = dict(RECORDED_EVENT, EventDate=pd.Timestamp(RECORDED_EVENT['EventDate']))
+    for i, (name, start) in enumerate(RECORDED_SESSIONS, start=1):
+        local = pd.Timestamp(start).tz_localize(RECORDED_TIMEZONE)
+        row[f'Session{i}'] = name
+        row[f'Session{i}Date'] = local
+        row[f'Session{i}DateUtc'] = local.tz_convert('UTC').tz_localize(None)
+    return EventSchedule(pd.DataFrame([row]), year=RECORDED_SESSION[0])
+
+
+def bench_recorded(results, repeat):
+    """Stages that read the recorded FastF1 session; skipped when it cannot be loaded
+
+    The fixture holds timing data only, so these cover the session index,
+    lap loading and the lap-based metrics; extraction and round-trips run on
+    the synthetic fixtures.
+    """
+    year, grand_prix, session_name = RECORDED_SESSION
+    schedule = recorded_schedule()
+    event = schedule.get_event_by_name(grand_prix)
+
+    def load_laps():
+        session = event.get_session(session_name)
+        session.load(laps=True, telemetry=False, weather=False, messages=False)
+        return session
+
+    def index_season():
+        events = sessions_from_schedule(year, schedule)
+        tracklytix.session_index.put_season(year, events)
+        return events
+
+    def available_sessions():
+        sessions, complete = tracklytix.lookup_available_sessions(year, grand_prix)
+        if not complete or session_name not in sessions:
+            raise RuntimeError(f"available sessions came from the fallback, not the index: {sessions}")
+        return sessions
+
+    stages = [
+        ('recorded.session_index', index_season),
+        ('recorded.available_sessions', available_sessions),
+        ('recorded.session_load', load_laps),
+    ]
+    for name, func in stages:
+        try:
+            results[name] = measure(func, repeat)
+        except Exception as e:
+            results[name] = {'skipped': str(e)}
+
+    try:
+        laps = load_laps().laps
+        if len(laps) == 0:
+            raise RuntimeError("recorded session has no laps")
+        results['recorded.race_pace'] = measure(lambda: compute_race_pace(laps), repeat)
+        results['recorded.sector_metrics'] = measure(lambda: compute_sector_metrics(laps), repeat)
+    except Exception as e:
+        results['recorded.race_pace'] = results['recorded.sector_metrics'] = {'skipped': str(e)}
+
+
+def check(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"/generate_analysis returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def compare(results, baseline, tolerance):
+    """Benchmarks whose median grew by more than tolerance (fraction) against the baseline report"""
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get('results', {}).get(name, {})
+        if 'median_ms' not in stats or 'median_ms' not in before:
+            continue
+        slowdown = stats['median_ms'] - before['median_ms']
+        if slowdown > MIN_REGRESSION_MS and stats['median_ms'] > before['median_ms'] * (1 + tolerance):
+            regressions.append({'benchmark': name, 'baseline_ms': before['median_ms'], 'median_ms': stats['median_ms']})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the analysis pipeline and write a JSON report')
+    parser.add_argument('--drivers', default=','.join(map(str, DRIVER_COUNTS)), help='Driver counts, e.g. 1,5,10,20')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per benchmark (the first is reported as cold)')
+    parser.add_argument('--output', help='Write the JSON report here (default: stdout)')
+    parser.add_argument('--baseline', help='Previous report to compare against; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed median slowdown as a fraction')
+    parser.add_argument('--skip-recorded', action='store_true', help='Only run the synthetic fixtures (otherwise recorded stages that cannot load fail the run)')
+    parser.add_argument('--online', action='store_true', help='Allow FastF1 to fetch data missing from the cache')
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    counts = [int(n) for n in args.drivers.split(',') if n.strip()]
+    repeat = max(args.repeat, 2)
+
+    results = {}
+    bench_startup(results, repeat)
+    get_fastf1().Cache.offline_mode(not args.online)
+    bench_synthetic(results, counts, repeat)
+    if not args.skip_recorded:
+        bench_recorded(results, repeat)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'processing_version': tracklytix.PROCESSING_VERSION,
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'fastf1': get_fastf1().__version__,
+            'executor': tracklytix.driver_executor.kind,
+        },
+        'config': {'drivers': counts, 'repeat': repeat, 'minisectors': MINISECTOR_COUNT},
+        'results': results,
+    }
+
+    regressions = []
+    startup = results['startup.import_app']
+    if startup['median_ms'] > IMPORT_BUDGET_MS:
+        regressions.append({'benchmark': 'startup.import_app', 'baseline_ms': IMPORT_BUDGET_MS, 'median_ms': startup['median_ms']})
+    # A recorded stage that could not run is a failure, not a pass; use --skip-recorded to opt out
+    regressions.extend({'benchmark': name, 'skipped': stats['skipped']}
+                       for name, stats in results.items() if 'skipped' in stats)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions.extend(compare(results, json.load(f), args.tolerance))
+    report['regressions'] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    for regression in regressions:
+        if 'skipped' in regression:
+            print(f"SKIPPED {regression['benchmark']}: {regression['skipped']}", file=sys.stderr)
+            continue
+        print(f"REGRESSION {regression['benchmark']}: {regression['baseline_ms']} ms -> {regression['median_ms']} ms",
+              file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import numpy as np
+import os
+
+# Default number of mini-sectors for the track dominance map (overridable from the environment)
+MINISECTOR_COUNT = int(os.environ.get("MINISECTOR_COUNT", 500))
+MAX_MINISECTORS = 2000
+
+
+def _clean_channels(tel):
+    """Return finite, distance-sorted Distance/Speed/X/Y arrays for one driver"""
+    distance = np.asarray(tel['Distance'], dtype=float)
+    speed = np.asarray(tel['Speed'], dtype=float)
+    x = np.asarray(tel['X'], dtype=float)
+    y = np.asarray(tel['Y'], dtype=float)
+    mask = np.isfinite(distance) & np.isfinite(speed) & np.isfinite(x) & np.isfinite(y)
+    distance, speed, x, y = distance[mask], speed[mask], x[mask], y[mask]
+    order = np.argsort(distance, kind='stable')
+    return distance[order], speed[order], x[order], y[order]
+
+
+def minisector_winners(telemetry, num_minisectors=MINISECTOR_COUNT):
+    """Fastest driver through each mini-sector as arrays; returns (drivers, winners, winner_speed, bounds) or None
+
+    winners indexes drivers per sector, winner_speed is that driver's mean
+    speed there and bounds holds the num_minisectors + 1 sector edges as
+    fractions of the lap.
+
+    telemetry maps driver -> raw (not downsampled) arrays with Distance in
+    metres, Speed, X and Y. All drivers' samples are binned in a single
+    searchsorted/bincount pass; sectors a driver has no samples in fall back
+    to the interpolated speed at the sector centre.
+    """
+    num_minisectors = int(min(max(num_minisectors, 1), MAX_MINISECTORS))
+    channels = {}
+    for driver, tel in telemetry.items():
+        distance, speed, x, y = _clean_channels(tel)
+        if len(distance) > 1:
+            channels[driver] = (distance, speed, x, y)
+    if not channels:
+        return None
+
+    drivers = list(channels)
+    n_drivers = len(drivers)
+
+    # Shortest lap distance keeps every driver covering every sector
+    lap_length = min(channels[d][0][-1] for d in drivers)
+    if lap_length <= 0:
+        return None
+    edges = np.linspace(0.0, lap_length, num_minisectors + 1)
+
+    distance = np.concatenate([channels[d][0] for d in drivers])
+    speed = np.concatenate([channels[d][1] for d in drivers])
+    owner = np.repeat(np.arange(n_drivers), [len(channels[d][0]) for d in drivers])
+
+    in_lap = distance <= lap_length
+    distance, speed, owner = distance[in_lap], speed[in_lap], owner[in_lap]
+    bins = np.clip(np.searchsorted(edges, distance, side='right') - 1, 0, num_minisectors - 1)
+    flat = owner * num_minisectors + bins
+
+    size = n_drivers * num_minisectors
+    sums = np.bincount(flat, weights=speed, minlength=size).reshape(n_drivers, num_minisectors)
+    counts = np.bincount(flat, minlength=size).reshape(n_drivers, num_minisectors)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_speed = sums / counts
+
+    empty = counts == 0
+    if empty.any():
+        centres = (edges[:-1] + edges[1:]) / 2
+        for i in np.flatnonzero(empty.any(axis=1)):
+            d_dist, d_speed = channels[drivers[i]][0], channels[drivers[i]][1]
+            mean_speed[i, empty[i]] = np.interp(centres[empty[i]], d_dist, d_speed)
+
+    winners = np.argmax(np.where(np.isfinite(mean_speed), mean_speed, -np.inf), axis=0)
+    winner_speed = mean_speed[winners, np.arange(num_minisectors)]
+
+    return drivers, winners, winner_speed, edges / lap_length
+
+
+def compute_minisector_dominance(telemetry, driver_colors, num_minisectors=MINISECTOR_COUNT):
+    """Fastest driver through each mini-sector, as one {driver, color, start, end, speed} dict per sector
+
+    Sectors carry their start and end as fractions of the lap rather than
+    coordinates; the client draws them on the circuit outline served by
+    /track_geometry.
+    """
+    found = minisector_winners(telemetry, num_minisectors)
+    if found is None:
+        return []
+    drivers, winners, winner_speed, bounds = found
+    bounds = bounds.tolist()
+
+    fastest_minisectors = []
+    for i, w in enumerate(winners.tolist()):
+        driver = drivers[w]
+        fastest_minisectors.append({
+            'driver': driver,
+            'color': driver_colors.get(driver, '#DDDDDD'),
+            'start': bounds[i],
+            'end': bounds[i + 1],
+            'speed': float(winner_speed[i])
+        })
+    return fastest_minisectors
@@ -0,0 +1,42 @@
+import os
+import time
+import threading
+import logging
+
+# FastF1 HTTP/parsed-data cache location (overridable from the environment)
+FASTF1_CACHE_DIR = os.environ.get("FASTF1_CACHE_DIR", os.path.join(os.getcwd(), 'fastf1_cache'))
+
+_fastf1 = None
+_lock = threading.Lock()
+
+
+def get_fastf1():
+    """Import FastF1 and enable its cache on first use; later calls return the configured module
+
+    FastF1 pulls in matplotlib, scipy and pandas, which is most of the
+    app's import time, so nothing imports it at module level. Server-side
+    plotting is never used, so plotting.setup_mpl is not called.
+    """
+    global _fastf1
+    if _fastf1 is None:
+        with _lock:
+            if _fastf1 is None:
+                start = time.perf_counter()
+                import fastf1
+                try:
+                    os.makedirs(FASTF1_CACHE_DIR, exist_ok=True)
+                    fastf1.Cache.enable_cache(FASTF1_CACHE_DIR)
+                    logging.info(f"FastF1 cache enabled at: {FASTF1_CACHE_DIR}")
+                except Exception as e:
+                    logging.warning(f"Cache setup failed: {e}")
+                logging.info(f"FastF1 imported in {time.perf_counter() - start:.2f}s")
+                _fastf1 = fastf1
+    return _fastf1
+
+
+def preload_analysis_stack():
+    """Import everything the analysis path needs now, e.g. in a gunicorn master before it forks workers"""
+    get_fastf1()
+    import pandas  # noqa: F401
+    import race_pace  # noqa: F401
+    import sector_metrics  # noqa: F401
@@ -0,0 +1,69 @@
+import numpy as np
+import struct
+
+# Binary "typed-array frames" encoding of analysis responses, selected with the Accept header
+FRAMES_MIMETYPE = 'application/vnd.tracklytix.frames'
+FRAMES_MAGIC = b'TLX1'
+FRAMES_ALIGNMENT = 8
+
+# Wire dtype per telemetry channel; anything else falls back to float32
+CHANNEL_DTYPES = {
+    'Speed': np.float32,
+    'Throttle': np.float32,
+    'Brake': np.uint8,
+    'Gear': np.int8,
+    'Distance': np.float32,
+    'Delta': np.float32,
+}
+
+
+def _padding(size):
+    return (-size) % FRAMES_ALIGNMENT
+
+
+def encode_analysis_frames(result, dumps_bytes):
+    """Encode an analysis result as a JSON header followed by aligned little-endian columns
+
+    Layout: magic (4 bytes), header length (uint32 LE), UTF-8 JSON header,
+    zero padding to an 8-byte boundary, then the columns, each padded to
+    8 bytes. In the header every telemetry channel is replaced by
+    {"$column": i}, and header["columns"][i] gives its dtype, length and
+    byte offset from the start of the column block, so the browser can wrap
+    each column in a typed array without copying. Arrays already in the
+    wire dtype are written as-is; others are cast once. Array channels of a
+    whole-field "matrix" block are encoded the same way, row-major, with
+    their shape in the descriptor. dumps_bytes serialises the header
+    (including any NumPy scalars) to UTF-8 bytes.
+    """
+    columns = []
+    descriptors = []
+
+    def column(channel, values):
+        dtype = np.dtype(CHANNEL_DTYPES.get(channel, np.float32)).newbyteorder('<')
+        array = np.ascontiguousarray(values, dtype=dtype)
+        offset = descriptors[-1]['offset'] + columns[-1].nbytes + _padding(columns[-1].nbytes) if columns else 0
+        descriptor = {'dtype': dtype.name, 'offset': offset, 'length': int(array.size)}
+        if array.ndim > 1:
+            descriptor['shape'] = list(array.shape)
+        descriptors.append(descriptor)
+        columns.append(array)
+        return {'$column': len(columns) - 1}
+
+    header = {k: v for k, v in result.items() if k not in ('telemetry', 'matrix')}
+    header['telemetry'] = {
+        driver: {channel: column(channel, values) for channel, values in channels.items()}
+        for driver, channels in result.get('telemetry', {}).items()
+    }
+    if 'matrix' in result:
+        header['matrix'] = {
+            channel: column(channel, values) if isinstance(values, np.ndarray) else values
+            for channel, values in result['matrix'].items()
+        }
+    header['columns'] = descriptors
+    header_bytes = dumps_bytes(header)
+
+    parts = [FRAMES_MAGIC, struct.pack('<I', len(header_bytes)), header_bytes, b'\0' * _padding(8 + len(header_bytes))]
+    for array in columns:
+        parts.append(memoryview(array).cast('B'))
+        parts.append(b'\0' * _padding(array.nbytes))
+    return b''.join(parts)
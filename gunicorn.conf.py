@@ -0,0 +1,14 @@
+import os
+
+# GUNICORN_PRELOAD=1 imports the app and the FastF1/pandas analysis stack once in the master so
+# forked workers start with it already in (copy-on-write) memory; by default workers boot lean
+# and import the heavy modules on their first analysis request.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "0") == "1"
+
+
+def when_ready(server):
+    # Runs in the master before any worker is forked
+    if preload_app:
+        from fastf1_setup import preload_analysis_stack
+        preload_analysis_stack()
+        server.log.info("Preloaded FastF1 and pandas before forking workers")
@@ -0,0 +1,106 @@
+import os
+import time
+import zlib
+import hashlib
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is used when brotli is not installed
+    brotli = None
+
+from frames import FRAMES_MIMETYPE
+
+# HTTP caching and compression settings (overridable from the environment)
+HTTP_CACHE_LIVE_MAX_AGE = int(os.environ.get("HTTP_CACHE_LIVE_MAX_AGE", 300))
+HTTP_CACHE_HISTORICAL_MAX_AGE = int(os.environ.get("HTTP_CACHE_HISTORICAL_MAX_AGE", 30 * 86400))
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 5))
+COMPRESS_CHUNK_BYTES = 64 * 1024
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    FRAMES_MIMETYPE,
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/javascript',
+    'application/javascript',
+}
+
+
+def make_etag(*parts, live_ttl=None):
+    """Deterministic ETag value for a request key
+
+    parts should identify the response completely (request key, processing
+    version, negotiated content type). For live-season data, live_ttl adds
+    the current time bucket so the tag rotates as stored results expire.
+    """
+    if live_ttl:
+        parts += (int(time.time() // live_ttl),)
+    return hashlib.sha1('\x1f'.join(map(str, parts)).encode('utf-8')).hexdigest()[:32]
+
+
+def apply_cache_headers(response, etag, live):
+    """Weak ETag (bytes differ per Content-Encoding) plus a Cache-Control policy for live or past sessions"""
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    if live:
+        response.cache_control.max_age = HTTP_CACHE_LIVE_MAX_AGE
+    else:
+        response.cache_control.max_age = HTTP_CACHE_HISTORICAL_MAX_AGE
+        response.cache_control.immutable = True
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def not_modified(request, response_class, etag, live):
+    """A 304 response when a GET/HEAD request's If-None-Match already holds etag, otherwise None"""
+    if request.method not in ('GET', 'HEAD') or not request.if_none_match.contains_weak(etag):
+        return None
+    return apply_cache_headers(response_class(status=304), etag, live)
+
+
+def negotiate_encoding(request):
+    """Best supported Content-Encoding the client accepts, or None"""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def _compressed_chunks(data, encoding):
+    """Compress data in fixed-size chunks so the first bytes go out before the whole body is compressed"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+        compress, flush = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress, flush = compressor.compress, compressor.flush
+    view = memoryview(data)
+    for start in range(0, len(view), COMPRESS_CHUNK_BYTES):
+        chunk = compress(view[start:start + COMPRESS_CHUNK_BYTES])
+        if chunk:
+            yield chunk
+    yield flush()
+
+
+def compress_response(request, response):
+    """Stream-compress large, buffered, compressible responses with brotli or gzip
+
+    Streamed responses (server-sent events, static files) and anything
+    already encoded, partial or small are passed through untouched.
+    """
+    if (request.method == 'HEAD' or response.status_code != 200 or response.is_streamed
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    encoding = negotiate_encoding(request)
+    if encoding is None:
+        return response
+    response.response = _compressed_chunks(data, encoding)
+    response.headers['Content-Encoding'] = encoding
+    response.headers.pop('Content-Length', None)
+    return response
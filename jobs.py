@@ -0,0 +1,157 @@
+import os
+import time
+import uuid
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from memory import memory_accountant, deep_sizeof
+
+# Job pool settings (overridable from the environment)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", 32))
+JOB_RESULT_TTL = int(os.environ.get("JOB_RESULT_TTL", 600))
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already queued or running"""
+
+
+class Job:
+    """A unit of background work with its progress stages and final result"""
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'
+        self.stages = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.result_bytes = 0
+        self._changed = threading.Condition()
+
+    def report(self, stage):
+        """Record a progress stage; safe to call from any thread"""
+        with self._changed:
+            self.stages.append({'stage': stage, 'elapsed': round(time.time() - self.created_at, 3)})
+            self._changed.notify_all()
+
+    def _finish(self, status, result=None, error=None):
+        with self._changed:
+            self.status = status
+            self.result = result
+            self.result_bytes = deep_sizeof(result) if result is not None else 0
+            self.error = error
+            self.finished_at = time.time()
+            self._changed.notify_all()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def wait_for_change(self, seen_stages, timeout):
+        """Block until there are more than seen_stages stages or the job finishes"""
+        with self._changed:
+            if len(self.stages) <= seen_stages and not self.finished:
+                self._changed.wait(timeout)
+            return list(self.stages[seen_stages:]), self.finished
+
+    def to_dict(self, include_result=True):
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'stages': list(self.stages),
+            'error': self.error,
+        }
+        if include_result and self.status == 'done':
+            data['result'] = self.result
+        return data
+
+
+class JobManager:
+    """Bounded background pool for long analyses, coalescing duplicate submissions
+
+    A submission whose key matches a queued, running or recently finished
+    job returns that job instead of starting another. Jobs live in the
+    memory of the worker process that accepted them, so status polling has
+    to reach the same process (e.g. gunicorn with one worker and several
+    threads, or sticky routing).
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING, result_ttl=JOB_RESULT_TTL):
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL (caller holds the lock)"""
+        cutoff = time.time() - self.result_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+
+    def submit(self, key, func, *args):
+        """Queue func(*args, progress=job.report) unless an equivalent job exists"""
+        with self._lock:
+            self._prune()
+            existing = self._by_key.get(key)
+            if existing is not None and existing.status != 'failed':
+                return existing, False
+
+            pending = sum(1 for job in self._jobs.values() if not job.finished)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs already pending")
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+
+        self._pool.submit(self._run, job, func, args)
+        return job, True
+
+    def _run(self, job, func, args):
+        job.status = 'running'
+        job.report('started')
+        try:
+            result = func(*args, progress=job.report)
+            job.report('finished')
+            job._finish('done', result=result)
+        except Exception as e:
+            logging.error(f"Job {job.id} failed: {e}")
+            job._finish('failed', error=str(e))
+        memory_accountant.enforce()
+
+    def memory_entries(self):
+        """Finished results held for polling clients"""
+        with self._lock:
+            return [(job.id, job.result_bytes, job.finished_at) for job in self._jobs.values() if job.result_bytes]
+
+    def evict(self, job_id):
+        """Forget a finished job early for the global memory budget; clients polling it get a 404"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.finished:
+                return False
+            del self._jobs[job_id]
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+            return True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ('queued', 'running', 'done', 'failed')}
+
+
+job_manager = JobManager()
+memory_accountant.register('job_results', job_manager)
@@ -0,0 +1,65 @@
+import sys
+import numpy as np
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional accelerated encoder
+    orjson = None
+
+
+def _numpy_default(obj):
+    """Convert NumPy and pandas values that the JSON encoders do not handle natively"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    # pandas values can only exist once pandas has been imported elsewhere, so never import it here
+    pd = sys.modules.get('pandas')
+    if pd is not None:
+        if obj is pd.NaT:
+            return None
+        if isinstance(obj, pd.Timedelta):
+            return obj.total_seconds()
+        if isinstance(obj, pd.Timestamp):
+            return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serialises NumPy scalars/arrays and pandas Timedelta/NaT directly
+
+    Uses orjson when it is installed (contiguous arrays are written straight
+    from their buffers and NaN becomes null); otherwise falls back to the
+    standard library encoder with the same conversions.
+    """
+
+    def _orjson_options(self, kwargs):
+        options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def _stdlib_default(self, obj):
+        try:
+            return _numpy_default(obj)
+        except TypeError:
+            return DefaultJSONProvider.default(obj)
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialise to UTF-8 bytes, skipping the str round-trip when orjson is available"""
+        if orjson is not None:
+            return orjson.dumps(obj, default=_numpy_default, option=self._orjson_options(kwargs))
+        return self.dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None:
+            return self.dumps_bytes(obj, **kwargs).decode('utf-8')
+        kwargs.setdefault('default', self._stdlib_default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,197 @@
+import os
+import threading
+import weakref
+
+import numpy as np
+
+# Lap selection limits (overridable from the environment)
+LAP_SELECTION_MAX = int(os.environ.get("LAP_SELECTION_MAX", 20))  # laps per driver in one comparison
+LAP_SELECTION_KINDS = ('numbers', 'best', 'stint')
+
+# Output channel -> FastF1 car data column
+CAR_CHANNELS = {
+    'Speed': 'Speed',
+    'Throttle': 'Throttle',
+    'Brake': 'Brake',
+    'Gear': 'nGear',
+}
+
+_index_cache = weakref.WeakKeyDictionary()
+_index_lock = threading.Lock()
+
+
+class NoLapsSelected(LookupError):
+    """Raised when a lap selection or delta reference matches no laps with telemetry"""
+
+
+def _seconds(series):
+    return series.dt.total_seconds().values if hasattr(series, 'dt') else np.asarray(series, dtype=float)
+
+
+def parse_lap_selection(value):
+    """Normalise a request's laps parameter into a hashable (kind, argument) tuple, or None for fastest lap
+
+    Accepted forms: "fastest", {"numbers": [3, 10]}, {"best": 5} and {"stint": 2}.
+    Raises ValueError with a message suitable for a 400 response.
+    """
+    if value in (None, '', 'fastest'):
+        return None
+    if not isinstance(value, dict) or len(value) != 1:
+        raise ValueError(f"laps must be \"fastest\" or an object with one of {', '.join(LAP_SELECTION_KINDS)}")
+    kind, argument = next(iter(value.items()))
+    if kind not in LAP_SELECTION_KINDS:
+        raise ValueError(f"Unknown lap selection {kind!r}, expected one of {', '.join(LAP_SELECTION_KINDS)}")
+    try:
+        if kind == 'numbers':
+            numbers = tuple(sorted({int(n) for n in argument}))
+            if not numbers or len(numbers) > LAP_SELECTION_MAX:
+                raise ValueError
+            return kind, numbers
+        argument = int(argument)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {kind} lap selection (at most {LAP_SELECTION_MAX} laps per driver)")
+    if argument < 1 or (kind == 'best' and argument > LAP_SELECTION_MAX):
+        raise ValueError(f"Invalid {kind} lap selection (at most {LAP_SELECTION_MAX} laps per driver)")
+    return kind, argument
+
+
+def select_lap_numbers(driver_laps, selection):
+    """Lap numbers of one driver's laps matching a parse_lap_selection() tuple, in lap order"""
+    lap_numbers = driver_laps['LapNumber'].values.astype(float)
+    lap_times = _seconds(driver_laps['LapTime'])
+    timed = np.isfinite(lap_numbers) & np.isfinite(lap_times)
+    if 'Deleted' in driver_laps:
+        timed &= ~driver_laps['Deleted'].fillna(False).values.astype(bool)
+
+    kind, argument = selection
+    if kind == 'numbers':
+        chosen = np.isin(lap_numbers, argument) & np.isfinite(lap_numbers)
+    elif kind == 'best':
+        order = np.flatnonzero(timed)[np.argsort(lap_times[timed], kind='stable')][:argument]
+        chosen = np.zeros(len(lap_numbers), dtype=bool)
+        chosen[order] = True
+    else:
+        stints = driver_laps['Stint'].values.astype(float) if 'Stint' in driver_laps else np.full(len(lap_numbers), np.nan)
+        chosen = timed & (stints == argument)
+    return sorted(int(n) for n in lap_numbers[chosen])[:LAP_SELECTION_MAX]
+
+
+class LapIndex:
+    """Random access to any lap's telemetry in a telemetry-loaded session
+
+    Each driver's car and position data are sorted by session time once, the
+    first time that driver is asked for; (driver, lap number) then maps to a
+    sample range through one searchsorted over all of the driver's lap
+    boundaries. Any set of laps is gathered with a single fancy index per
+    channel, position is interpolated onto the car samples and Distance is
+    integrated from Speed per lap, instead of FastF1 slicing and merging the
+    full streams again for every Lap.get_telemetry call.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self._drivers = {}
+        self._lock = threading.Lock()
+
+    def _build(self, driver):
+        """Sorted streams and lap sample ranges for one driver"""
+        laps = self.session.laps.pick_drivers(driver)
+        if len(laps) == 0:
+            raise KeyError(f"No laps for {driver}")
+        number = str(laps['DriverNumber'].iloc[0])
+        car = self.session.car_data[number]
+        pos = self.session.pos_data[number]
+
+        car_time = _seconds(car['SessionTime'])
+        car_order = np.argsort(car_time, kind='stable')
+        pos_time = _seconds(pos['SessionTime'])
+        pos_order = np.argsort(pos_time, kind='stable')
+
+        lap_numbers = laps['LapNumber'].values.astype(float)
+        lap_start = _seconds(laps['LapStartTime'])
+        lap_end = _seconds(laps['Time'])
+        known = np.isfinite(lap_numbers) & np.isfinite(lap_start) & np.isfinite(lap_end)
+        car_time = car_time[car_order]
+        starts = np.searchsorted(car_time, lap_start[known], side='left')
+        ends = np.searchsorted(car_time, lap_end[known], side='right')
+
+        return {
+            'time': car_time,
+            'channels': {name: np.asarray(car[column].values)[car_order] for name, column in CAR_CHANNELS.items()},
+            'pos_time': pos_time[pos_order],
+            'X': np.asarray(pos['X'].values, dtype=float)[pos_order],
+            'Y': np.asarray(pos['Y'].values, dtype=float)[pos_order],
+            'laps': {
+                int(n): (float(start_time), int(start), int(end))
+                for n, start_time, start, end in zip(lap_numbers[known], lap_start[known], starts, ends)
+            },
+        }
+
+    def _driver(self, driver):
+        with self._lock:
+            entry = self._drivers.get(driver)
+            if entry is None:
+                entry = self._build(driver)
+                self._drivers[driver] = entry
+            return entry
+
+    def lap_numbers(self, driver):
+        return sorted(self._driver(driver)['laps'])
+
+    def nbytes(self):
+        """Bytes held by the sorted per-driver copies built so far"""
+        total = 0
+        for entry in list(self._drivers.values()):
+            arrays = [entry['time'], entry['pos_time'], entry['X'], entry['Y'], *entry['channels'].values()]
+            total += sum(values.nbytes for values in arrays)
+        return total
+
+    def laps(self, driver, lap_numbers):
+        """Channels for each requested lap (Time in seconds since lap start), keyed by lap number
+
+        Laps without samples are left out.
+        """
+        entry = self._driver(driver)
+        ranges = [(n,) + entry['laps'][n] for n in lap_numbers if n in entry['laps']]
+        ranges = [(n, t0, start, end) for n, t0, start, end in ranges if end - start > 1]
+        if not ranges:
+            return {}
+
+        lengths = np.array([end - start for _, _, start, end in ranges])
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        index = np.concatenate([np.arange(start, end) for _, _, start, end in ranges])
+        lap_start = np.repeat([t0 for _, t0, _, _ in ranges], lengths)
+
+        session_time = entry['time'][index]
+        gathered = {name: values[index] for name, values in entry['channels'].items()}
+        gathered['X'] = np.interp(session_time, entry['pos_time'], entry['X'])
+        gathered['Y'] = np.interp(session_time, entry['pos_time'], entry['Y'])
+        gathered['Time'] = session_time - lap_start
+
+        # Distance from Speed, restarting at 0 on every lap like Telemetry.add_distance
+        dt = np.diff(gathered['Time'], prepend=0.0)
+        dt[offsets[:-1]] = 0.0
+        travelled = np.cumsum(gathered['Speed'].astype(float) / 3.6 * dt)
+        gathered['Distance'] = travelled - np.repeat(travelled[offsets[:-1]], lengths)
+
+        return {
+            n: {name: values[offsets[i]:offsets[i + 1]] for name, values in gathered.items()}
+            for i, (n, _, _, _) in enumerate(ranges)
+        }
+
+
+def session_lap_index(session):
+    """Lap index for a loaded session, built once and kept for as long as the session lives"""
+    with _index_lock:
+        index = _index_cache.get(session)
+        if index is None:
+            index = LapIndex(session)
+            _index_cache[session] = index
+        return index
+
+
+def lap_index_bytes(session):
+    """Memory held by a session's lap index, 0 if none was built"""
+    with _index_lock:
+        index = _index_cache.get(session)
+    return index.nbytes() if index is not None else 0
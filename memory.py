@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import threading
+import logging
+
+import numpy as np
+
+# Global budget for everything the app caches in memory (overridable from the environment); 0 disables it
+MEMORY_BUDGET_MB = int(os.environ.get("MEMORY_BUDGET_MB", 0))
+
+
+def deep_sizeof(obj, _seen=None):
+    """Approximate bytes held by a result: array buffers, DataFrames and the containers around them"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, np.memmap):
+        return 0  # file-backed, reclaimable page cache
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(index=True, deep=False)))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    return size
+
+
+def process_rss():
+    """Resident set size of this process in bytes (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryAccountant:
+    """Tracks memory held by registered caches and evicts the globally least recently used entries
+
+    A cache registers with a name and implements memory_entries(), returning
+    (key, bytes, last_used) tuples, and evict(key). Caches call enforce()
+    after growing, without holding their own locks, so eviction can call
+    back into any of them.
+    """
+
+    def __init__(self, budget_bytes=MEMORY_BUDGET_MB * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.evictions = 0
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, cache):
+        self._caches[name] = cache
+
+    def _entries(self):
+        entries = []
+        for name, cache in list(self._caches.items()):
+            for key, size, last_used in cache.memory_entries():
+                entries.append((last_used, name, key, size))
+        return entries
+
+    def total_bytes(self):
+        return sum(size for _, _, _, size in self._entries())
+
+    def enforce(self):
+        """Evict least recently used entries across all caches until the total fits the budget"""
+        if self.budget_bytes <= 0:
+            return
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[0])
+            total = sum(size for _, _, _, size in entries)
+            for last_used, name, key, size in entries:
+                if total <= self.budget_bytes:
+                    break
+                if self._caches[name].evict(key):
+                    total -= size
+                    self.evictions += 1
+                    logging.info(f"Memory budget: evicted {name} entry {key} ({size / 1e6:.1f} MB)")
+
+    def usage(self):
+        """Per-cache totals and per-entry sizes, most recently used first"""
+        caches = {}
+        for name, cache in list(self._caches.items()):
+            entries = sorted(cache.memory_entries(), key=lambda entry: entry[2], reverse=True)
+            caches[name] = {
+                'bytes': sum(size for _, size, _ in entries),
+                'entries': [
+                    {'key': str(key), 'bytes': size, 'idle_seconds': round(time.time() - last_used, 1)}
+                    for key, size, last_used in entries
+                ],
+            }
+        return {
+            'budget_bytes': self.budget_bytes,
+            'total_bytes': sum(cache['bytes'] for cache in caches.values()),
+            'rss_bytes': process_rss(),
+            'evictions': self.evictions,
+            'caches': caches,
+        }
+
+
+memory_accountant = MemoryAccountant()
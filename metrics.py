@@ -0,0 +1,186 @@
+import os
+import time
+import threading
+
+# Instrumentation switch (overridable from the environment); when off, spans and request hooks do nothing
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _format_labels(self.labels, k), v) for k, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, e.g. requests in flight"""
+
+    kind = 'gauge'
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by label values"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def samples(self):
+        lines = []
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for label_values, series in items:
+            for bound, count in zip(self.buckets, series):
+                labels = _format_labels(self.labels + ('le',), label_values + (repr(bound),))
+                lines.append((f'{self.name}_bucket', labels, count))
+            labels = _format_labels(self.labels + ('le',), label_values + ('+Inf',))
+            lines.append((f'{self.name}_bucket', labels, series[-1]))
+            labels = _format_labels(self.labels, label_values)
+            lines.append((f'{self.name}_sum', labels, round(series[-2], 6)))
+            lines.append((f'{self.name}_count', labels, series[-1]))
+        return lines
+
+
+stage_seconds = Histogram('tracklytix_stage_seconds', 'Time spent in each analysis stage', ('stage',))
+request_seconds = Histogram('tracklytix_request_seconds', 'HTTP request latency', ('endpoint',))
+requests_total = Counter('tracklytix_requests_total', 'HTTP requests handled', ('endpoint', 'status'))
+requests_in_flight = Gauge('tracklytix_requests_in_flight', 'HTTP requests currently being handled', ('endpoint',))
+_metrics = [stage_seconds, request_seconds, requests_total, requests_in_flight]
+_collectors = []
+_request = threading.local()
+
+
+def register_collector(func):
+    """Add a callable returning (name, kind, help, labels, value) tuples read at scrape time, e.g. cache counters"""
+    _collectors.append(func)
+    return func
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stage_seconds.observe(elapsed, self.name)
+        timings = getattr(_request, 'timings', None)
+        if timings is not None:
+            timings.append((self.name, elapsed))
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name):
+    """Time a block into the stage histogram and, on a request thread, its Server-Timing header"""
+    if not METRICS_ENABLED:
+        return _NOOP_SPAN
+    return _Span(name)
+
+
+def begin_request(endpoint):
+    if not METRICS_ENABLED:
+        return
+    _request.timings = []
+    _request.start = time.perf_counter()
+    _request.endpoint = endpoint or 'unknown'
+    requests_in_flight.inc(_request.endpoint)
+
+
+def server_timing():
+    """Server-Timing header value for the spans recorded on this request thread so far"""
+    timings = getattr(_request, 'timings', None)
+    if timings is None:
+        return None
+    entries = [f'{name.replace(" ", "_")};dur={elapsed * 1000:.1f}' for name, elapsed in timings]
+    entries.append(f'total;dur={(time.perf_counter() - _request.start) * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def end_request(status):
+    if getattr(_request, 'timings', None) is None:
+        return
+    endpoint = _request.endpoint
+    request_seconds.observe(time.perf_counter() - _request.start, endpoint)
+    requests_total.inc(endpoint, status)
+    requests_in_flight.dec(endpoint)
+    _request.timings = None
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _metrics:
+        lines.append(f'# HELP {metric.name} {metric.help_text}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(f'{name}{labels} {value}' for name, labels, value in metric.samples())
+    described = set()
+    for collector in _collectors:
+        for name, kind, help_text, labels, value in collector():
+            if name not in described:
+                described.add(name)
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+            lines.append(f'{name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,113 @@
+import os
+import time
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# Per-driver extraction settings (overridable from the environment)
+EXTRACTION_EXECUTOR = os.environ.get("EXTRACTION_EXECUTOR", "thread")  # 'thread', 'process' or 'serial'
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", 4))
+EXTRACTION_TIMEOUT = float(os.environ.get("EXTRACTION_TIMEOUT", 60))
+EXTRACTION_MP_CONTEXT = os.environ.get("EXTRACTION_MP_CONTEXT", "spawn")
+EXTRACTION_POLL_S = 0.05  # how often queued drivers are checked for having started
+
+
+class DriverExecutor:
+    """Fan per-driver work out over a shared thread or process pool
+
+    The pool is created lazily and reused across requests. Results are
+    joined in the order the drivers were given, and any driver that fails
+    or is still running timeout seconds after it started is reported
+    separately instead of holding up the rest. Drivers queued behind busy
+    workers get their own timeout once they start, but the whole call never
+    waits longer than one timeout per wave of max_workers drivers. Work that
+    times out keeps running in the background (Python cannot interrupt it)
+    but its result is discarded. Single drivers go through the pool too, so
+    they get the same timeout; the 'serial' kind runs drivers inline in the
+    calling thread and has no timeout.
+    """
+
+    def __init__(self, kind=EXTRACTION_EXECUTOR, max_workers=EXTRACTION_WORKERS, timeout=EXTRACTION_TIMEOUT):
+        if kind not in ('thread', 'process', 'serial'):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.kind == 'process':
+                    context = multiprocessing.get_context(EXTRACTION_MP_CONTEXT)
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='extract')
+            return self._pool
+
+    def map(self, func, drivers, *args):
+        """Run func(*args, driver) per driver; return ({driver: result}, {driver: error message})"""
+        results = {}
+        errors = {}
+
+        if self.kind == 'serial' or not drivers:
+            for driver in drivers:
+                try:
+                    results[driver] = func(*args, driver)
+                except Exception as e:
+                    logging.error(f"Extraction failed for {driver}: {e}")
+                    errors[driver] = str(e)
+            return results, errors
+
+        pool = self._get_pool()
+        futures = {driver: pool.submit(func, *args, driver) for driver in drivers}
+        started = self._wait(list(futures.values()))
+
+        for driver in drivers:
+            future = futures[driver]
+            if not future.done():
+                future.cancel()
+                if future not in started:
+                    error = "never started, all workers stayed busy"
+                elif time.monotonic() - started[future] >= self.timeout:
+                    error = f"timed out after {self.timeout}s"
+                else:
+                    error = "still running when the batch deadline passed"
+                logging.warning(f"Extraction for {driver} {error}")
+                errors[driver] = error
+                continue
+            try:
+                results[driver] = future.result()
+            except Exception as e:
+                logging.error(f"Extraction failed for {driver}: {e}")
+                errors[driver] = str(e)
+        return results, errors
+
+    def _wait(self, futures):
+        """Wait until every future is done or past its own deadline; returns {future: monotonic start time}"""
+        started = {}
+        deadline = time.monotonic() + self.timeout * -(-len(futures) // self.max_workers)
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            for future in pending:
+                if future not in started and future.running():
+                    started[future] = now
+            pending = {f for f in pending if now - started.get(f, now) < self.timeout}
+            if not pending or now >= deadline:
+                break
+            wake = min([started[f] + self.timeout for f in pending if f in started] + [deadline])
+            done, _ = wait(pending, timeout=min(wake - now, EXTRACTION_POLL_S), return_when=FIRST_COMPLETED)
+            pending -= done
+        return started
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+driver_executor = DriverExecutor()
@@ -0,0 +1,162 @@
+import os
+import sys
+import json
+import time
+import threading
+import logging
+from collections import Counter
+
+# Profiling settings (overridable from the environment)
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET", "")  # X-Profile header value that forces a profile; empty disables
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", 0))  # keep profiles of requests slower than this; 0 disables
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 5))
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 50))
+PROFILE_HEADER = 'X-Profile'
+
+# Worker threads sampled alongside the request thread (see parallel.DriverExecutor)
+WORKER_THREAD_PREFIXES = ('extract',)
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def fold_stack(frame, thread_name):
+    """Collapse a stack into the 'root;...;leaf' form used by flamegraph.pl and speedscope"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ';'.join(reversed(labels))
+
+
+class Capture:
+    """Stack samples collected for one request"""
+
+    def __init__(self, thread_ident, include_workers=True):
+        self.thread_ident = thread_ident
+        self.include_workers = include_workers
+        self.samples = Counter()
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms = None
+
+    def finish(self):
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        return self
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+
+class SamplingProfiler:
+    """Samples the stacks of threads serving profiled requests on a background thread
+
+    The sampler only runs while at least one capture is active. Worker
+    threads are shared between requests, so when several profiled requests
+    overlap their extraction samples can appear in each other's profiles.
+    """
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._captures = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, include_workers=True):
+        capture = Capture(threading.get_ident(), include_workers)
+        with self._lock:
+            self._captures.add(capture)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+                self._thread.start()
+        return capture
+
+    def stop(self, capture):
+        with self._lock:
+            self._captures.discard(capture)
+        return capture.finish()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                captures = list(self._captures)
+                if not captures:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            workers = [ident for ident, name in names.items() if name.startswith(WORKER_THREAD_PREFIXES)]
+            for capture in captures:
+                idents = [capture.thread_ident] + (workers if capture.include_workers else [])
+                for ident in idents:
+                    frame = frames.get(ident)
+                    # Idle pool workers sit in ThreadPoolExecutor._worker waiting for work
+                    if frame is None or (ident != capture.thread_ident and frame.f_code.co_name == '_worker'):
+                        continue
+                    capture.samples[fold_stack(frame, names.get(ident, str(ident)))] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Keeps the most recent profiles on disk as <id>.folded stacks plus <id>.json metadata"""
+
+    def __init__(self, path, keep=PROFILE_KEEP):
+        self.path = path
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def save(self, profile_id, capture, **meta):
+        meta = dict(meta, id=profile_id, created_at=capture.started_at,
+                    duration_ms=round(capture.duration_ms, 1), samples=sum(capture.samples.values()))
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            with open(os.path.join(self.path, f'{profile_id}.folded'), 'w') as f:
+                f.write(capture.folded())
+            with open(os.path.join(self.path, f'{profile_id}.json'), 'w') as f:
+                json.dump(meta, f)
+            self._prune()
+        logging.info(f"Saved profile {profile_id} ({meta['duration_ms']} ms, {meta['samples']} samples)")
+        return meta
+
+    def _prune(self):
+        """Delete the oldest profiles beyond the retention limit (caller holds the lock)"""
+        entries = sorted(
+            (os.path.getmtime(os.path.join(self.path, name)), name[:-5])
+            for name in os.listdir(self.path) if name.endswith('.json')
+        )
+        for _, profile_id in entries[:max(0, len(entries) - self.keep)]:
+            for suffix in ('.json', '.folded'):
+                try:
+                    os.remove(os.path.join(self.path, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def list(self):
+        if not os.path.isdir(self.path):
+            return []
+        profiles = []
+        for name in os.listdir(self.path):
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.path, name)) as f:
+                        profiles.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return sorted(profiles, key=lambda p: p['created_at'], reverse=True)
+
+    def folded(self, profile_id):
+        """Folded stacks of a stored profile, or None; profile_id must be a plain id, not a path"""
+        if not profile_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self.path, f'{profile_id}.folded')) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,161 @@
+import numpy as np
+import threading
+import weakref
+
+# Race pace settings
+ROLLING_WINDOW = 5
+PACE_OUTLIER_FACTOR = 1.07  # clean laps must be within 107% of the driver's median lap
+
+_pace_cache = weakref.WeakKeyDictionary()
+_pace_lock = threading.Lock()
+
+
+def _lap_frame(laps):
+    """Flatten the lap columns the pace engine needs into plain NumPy-backed columns"""
+    import pandas as pd
+    frame = pd.DataFrame({
+        'Driver': laps['Driver'].values,
+        'LapNumber': laps['LapNumber'].values.astype(float),
+        'LapTime': laps['LapTime'].dt.total_seconds().values,
+        'Stint': laps['Stint'].values.astype(float) if 'Stint' in laps else np.nan,
+        'Compound': laps['Compound'].values if 'Compound' in laps else None,
+        'TyreLife': laps['TyreLife'].values.astype(float) if 'TyreLife' in laps else np.nan,
+        'Pit': (laps['PitInTime'].notna() | laps['PitOutTime'].notna()).values
+        if 'PitInTime' in laps and 'PitOutTime' in laps else False,
+    })
+    frame = frame.dropna(subset=['Driver', 'LapNumber'])
+    frame = frame.sort_values(['Driver', 'LapNumber'], kind='stable').reset_index(drop=True)
+    frame['Stint'] = frame['Stint'].fillna(0.0)
+    frame['Compound'] = frame['Compound'].fillna('UNKNOWN')
+    return frame
+
+
+def _nullable(values):
+    """Float list with NaN as None so missing laps serialise as null on every JSON encoder"""
+    import pandas as pd
+    return pd.Series(values, dtype=object).where(pd.notna(values), None).tolist()
+
+
+def compute_race_pace(laps):
+    """Lap-by-lap arrays plus stint pace and tyre degradation for every driver in one pass
+
+    All statistics come from grouped aggregations over the whole lap table
+    rather than per-driver loops. Clean laps exclude pit in/out laps, laps
+    without a time and laps slower than 107% of the driver's median (safety
+    car, traffic). Consistency is 100 - the coefficient of variation in %
+    and stint tyre efficiency is 100 - |first-half vs second-half pace
+    change| in %, both computed on clean laps.
+    """
+    import pandas as pd
+    frame = _lap_frame(laps)
+    if frame.empty:
+        return {}
+
+    by_driver = frame.groupby('Driver', sort=False)
+    valid = frame['LapTime'].where(frame['LapTime'] > 0)
+    median = valid.groupby(frame['Driver']).transform('median')
+    frame['Clean'] = valid.notna() & ~frame['Pit'] & (valid <= median * PACE_OUTLIER_FACTOR)
+    clean_time = frame['LapTime'].where(frame['Clean'])
+
+    frame['RollingPace'] = (
+        clean_time.groupby(frame['Driver']).rolling(ROLLING_WINDOW, min_periods=1).mean()
+        .reset_index(level=0, drop=True)
+    )
+
+    # Consistency: all valid laps (existing advanced metric) and clean laps (pace engine)
+    valid_stats = valid.groupby(frame['Driver']).agg(['count'])
+    valid_std = valid.groupby(frame['Driver']).std(ddof=0)
+    clean_stats = clean_time.groupby(frame['Driver']).agg(['mean', 'median', 'count'])
+    clean_std = clean_time.groupby(frame['Driver']).std(ddof=0)
+
+    # Degradation slope per stint by closed-form least squares over clean laps
+    stint_laps = frame[frame['Clean']].copy()
+    position = stint_laps.groupby(['Driver', 'Stint']).cumcount()
+    stint_laps['Age'] = stint_laps['TyreLife'].fillna(position + 1.0)
+    stint_laps['AgeTime'] = stint_laps['Age'] * stint_laps['LapTime']
+    stint_laps['AgeSq'] = stint_laps['Age'] ** 2
+    stint_size = stint_laps.groupby(['Driver', 'Stint'])['LapTime'].transform('size')
+    stint_laps['SecondHalf'] = position >= stint_size // 2
+
+    grouped = stint_laps.groupby(['Driver', 'Stint'], sort=True)
+    stints = grouped.agg(
+        compound=('Compound', 'first'),
+        first_lap=('LapNumber', 'min'),
+        last_lap=('LapNumber', 'max'),
+        laps=('LapTime', 'size'),
+        mean_pace=('LapTime', 'mean'),
+        sx=('Age', 'sum'),
+        sy=('LapTime', 'sum'),
+        sxx=('AgeSq', 'sum'),
+        sxy=('AgeTime', 'sum'),
+    )
+    n = stints['laps']
+    denominator = n * stints['sxx'] - stints['sx'] ** 2
+    slope = (n * stints['sxy'] - stints['sx'] * stints['sy']) / denominator.where(denominator > 0)
+    stints['deg_slope'] = slope.fillna(0.0)
+
+    halves = stint_laps.groupby(['Driver', 'Stint', 'SecondHalf'])['LapTime'].mean().unstack()
+    first_half = halves.get(False)
+    second_half = halves.get(True)
+    if first_half is not None and second_half is not None:
+        degradation = (second_half - first_half) / first_half * 100
+        efficiency = (100 - degradation.abs()).clip(lower=0)
+        stints['tyre_efficiency'] = efficiency.reindex(stints.index).where(n >= 3, 0.0).fillna(0.0)
+    else:
+        stints['tyre_efficiency'] = 0.0
+
+    pace = {}
+    for driver, rows in by_driver.indices.items():
+        laps_slice = frame.iloc[rows]
+        driver_stints = stints.loc[driver] if driver in stints.index.get_level_values(0) else stints.iloc[0:0]
+        clean_mean = clean_stats['mean'].get(driver, np.nan)
+        clean_count = int(clean_stats['count'].get(driver, 0))
+        if clean_count >= 2 and clean_mean > 0:
+            pace_consistency = max(0.0, 100 - (clean_std[driver] / clean_mean * 100))
+        else:
+            pace_consistency = 0.0
+
+        pace[driver] = {
+            'laps': {
+                'lap_number': laps_slice['LapNumber'].values.astype(int),
+                'lap_time': _nullable(laps_slice['LapTime'].values),
+                'stint': laps_slice['Stint'].values.astype(int),
+                'compound': laps_slice['Compound'].tolist(),
+                'pit': laps_slice['Pit'].values.astype(bool),
+                'clean': laps_slice['Clean'].values.astype(bool),
+                'rolling_pace': _nullable(laps_slice['RollingPace'].values),
+            },
+            'summary': {
+                'clean_laps': clean_count,
+                'mean_pace': float(clean_mean) if clean_count else None,
+                'median_pace': float(clean_stats['median'].get(driver)) if clean_count else None,
+                'pace_consistency': float(pace_consistency),
+                'valid_laps': int(valid_stats['count'].get(driver, 0)),
+                'valid_std': float(valid_std.get(driver, 0.0)) if valid_stats['count'].get(driver, 0) > 1 else 0.0,
+                'stints': [
+                    {
+                        'stint': int(stint),
+                        'compound': row['compound'],
+                        'first_lap': int(row['first_lap']),
+                        'last_lap': int(row['last_lap']),
+                        'laps': int(row['laps']),
+                        'mean_pace': float(row['mean_pace']),
+                        'deg_slope': float(row['deg_slope']),
+                        'tyre_efficiency': float(row['tyre_efficiency']),
+                    }
+                    for stint, row in driver_stints.iterrows()
+                ],
+            },
+        }
+    return pace
+
+
+def session_race_pace(session):
+    """Race pace for a loaded session, computed once and kept for as long as the session lives"""
+    # Held while computing so parallel per-driver extraction shares a single pass
+    with _pace_lock:
+        pace = _pace_cache.get(session)
+        if pace is None:
+            pace = compute_race_pace(session.laps)
+            _pace_cache[session] = pace
+        return pace
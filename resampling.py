@@ -0,0 +1,206 @@
+import numpy as np
+import os
+
+# Spacing of the shared distance grid every driver is projected onto (overridable from the environment)
+RESAMPLE_STEP_M = float(os.environ.get("RESAMPLE_STEP_M", 2.0))
+DEFAULT_POINT_BUDGET = 500
+MIN_POINT_BUDGET = 50
+MAX_POINT_BUDGET = 5000
+DOWNSAMPLE_METHODS = ('lttb', 'minmax', 'stride')
+
+# Discrete channels take the last sample at or before each grid point instead of interpolating
+STEP_CHANNELS = ('Gear', 'Brake')
+
+
+def clamp_point_budget(points):
+    return int(min(max(int(points), MIN_POINT_BUDGET), MAX_POINT_BUDGET))
+
+
+def resample_by_distance(distance, channels, step=RESAMPLE_STEP_M):
+    """Project channels onto the shared grid 0, step, 2*step, ... up to this lap's length
+
+    Because the grid always starts at 0 m with a fixed step, any two laps
+    resampled here share identical distance values and can be overlaid or
+    subtracted index by index, whichever drivers are selected.
+    """
+    distance = np.asarray(distance, dtype=float)
+    mask = np.isfinite(distance)
+    distance = distance[mask]
+    order = np.argsort(distance, kind='stable')
+    distance = distance[order]
+    # np.interp needs strictly increasing x; keep the first sample at each distance
+    distance, first = np.unique(distance, return_index=True)
+
+    grid = np.arange(0.0, distance[-1] if len(distance) else 0.0, step)
+    resampled = {'Distance': grid}
+    for name, values in channels.items():
+        values = np.asarray(values)[mask][order][first]
+        if name in STEP_CHANNELS:
+            idx = np.clip(np.searchsorted(distance, grid, side='right') - 1, 0, len(distance) - 1)
+            resampled[name] = values[idx]
+        else:
+            resampled[name] = np.interp(grid, distance, values.astype(float))
+    return resampled
+
+
+def lttb_indices(x, y, budget):
+    """Largest-Triangle-Three-Buckets: indices of budget points that preserve the visual shape"""
+    n = len(x)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, budget - 1).astype(int)  # strictly increasing since budget < n
+    # Average of each next bucket (the last one runs to the final point) is the third triangle vertex
+    counts = np.diff(np.append(edges[1:], n))
+    avg_x = np.add.reduceat(x, edges[1:]) / counts
+    avg_y = np.add.reduceat(y, edges[1:]) / counts
+
+    selected = np.empty(budget, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for i in range(budget - 2):
+        start, end = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[prev] - avg_x[i]) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y[i] - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+def minmax_indices(y, budget):
+    """Indices of the minimum and maximum of each of budget // 2 equal buckets"""
+    n = len(y)
+    buckets = max(budget // 2, 1)
+    if 2 * buckets >= n:
+        return np.arange(n)
+
+    size = -(-n // buckets)
+    buckets = -(-n // size)  # no trailing bucket made only of padding
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.nanargmin(blocks, axis=1)
+    highs = offsets + np.nanargmax(blocks, axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def event_indices(channels):
+    """Samples on both sides of every gear change and brake application/release"""
+    events = []
+    for name in STEP_CHANNELS:
+        if name in channels:
+            values = np.asarray(channels[name])
+            changes = np.flatnonzero(values[1:] != values[:-1])
+            events.extend([changes, changes + 1])
+    if not events:
+        return np.empty(0, dtype=int)
+    return np.unique(np.concatenate(events))
+
+
+def downsample(channels, budget=DEFAULT_POINT_BUDGET, method='lttb', key='Speed'):
+    """Thin resampled channels to at most budget points, keeping gear and brake transitions
+
+    key is the channel whose shape drives LTTB/min-max selection. Transition
+    points are kept first (up to half the budget) and the rest of the budget
+    goes to the shape-preserving selection.
+    """
+    n = len(channels['Distance'])
+    if n <= budget:
+        return channels
+
+    events = event_indices(channels)
+    if len(events) > budget // 2:
+        # Very busy laps: keep an even spread of transitions so the budget still holds
+        events = events[np.linspace(0, len(events) - 1, budget // 2).astype(int)]
+    shape_budget = budget - len(events)
+    if method == 'lttb':
+        picked = lttb_indices(channels['Distance'], np.asarray(channels[key], dtype=float), shape_budget)
+    elif method == 'minmax':
+        picked = minmax_indices(np.asarray(channels[key], dtype=float), shape_budget)
+    elif method == 'stride':
+        picked = np.linspace(0, n - 1, shape_budget).astype(int)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    indices = np.union1d(picked, events)
+    return {name: np.asarray(values)[indices] for name, values in channels.items()}
+
+
+def cumulative_deltas(lap_times, reference):
+    """Running time gap to the reference driver at each shared grid point (positive = behind)
+
+    lap_times maps driver -> elapsed lap time in seconds on the shared grid.
+    Grids only differ in length, so each delta is one vectorised
+    subtraction; points beyond the reference's last grid point hold the
+    final gap.
+    """
+    ref = np.asarray(lap_times[reference], dtype=float)
+    deltas = {}
+    for driver, elapsed in lap_times.items():
+        elapsed = np.asarray(elapsed, dtype=float)
+        n = min(len(elapsed), len(ref))
+        delta = np.zeros(len(elapsed))
+        delta[:n] = elapsed[:n] - ref[:n]
+        if 0 < n < len(elapsed):
+            delta[n:] = delta[n - 1]
+        deltas[driver] = delta
+    return deltas
+
+
+def stack_grids(grids):
+    """Stack per-driver channels on the shared grid into drivers x points matrices
+
+    grids is a list of channel dicts from resample_by_distance. Grids only
+    differ in length, so row i column j is every driver's value at the same
+    distance; columns past a driver's lap hold its last value. Returns
+    (distance, {channel: matrix}, lengths) with lengths the valid column
+    count per row.
+    """
+    lengths = np.array([len(grid['Distance']) for grid in grids])
+    longest = grids[int(np.argmax(lengths))]['Distance']
+    matrices = {}
+    for name in grids[0]:
+        if name == 'Distance':
+            continue
+        matrix = np.empty((len(grids), len(longest)))
+        for i, grid in enumerate(grids):
+            values = np.asarray(grid[name], dtype=float)
+            matrix[i, :len(values)] = values
+            matrix[i, len(values):] = values[-1] if len(values) else np.nan
+        matrices[name] = matrix
+    return longest, matrices, lengths
+
+
+def matrix_deltas(elapsed, lengths, reference):
+    """cumulative_deltas for a drivers x points elapsed-time matrix in one subtraction
+
+    Points beyond either lap's end hold the gap at the shorter lap's last
+    common grid point, matching cumulative_deltas.
+    """
+    columns = np.arange(elapsed.shape[1])
+    common = np.minimum(lengths, lengths[reference])
+    last = np.clip(common - 1, 0, None)
+    deltas = elapsed - elapsed[reference]
+    held = deltas[np.arange(len(lengths)), last][:, None]
+    return np.where(columns[None, :] < common[:, None], deltas, held)
+
+
+def shared_indices(distance, matrix, budget=DEFAULT_POINT_BUDGET, method='lttb'):
+    """Column indices thinning a whole drivers x points matrix to budget points, picked once from the field mean"""
+    n = len(distance)
+    if n <= budget:
+        return np.arange(n)
+    envelope = np.nanmean(matrix, axis=0)
+    if method == 'lttb':
+        return lttb_indices(distance, envelope, budget)
+    if method == 'minmax':
+        return minmax_indices(envelope, budget)
+    if method == 'stride':
+        return np.linspace(0, n - 1, budget).astype(int)
+    raise ValueError(f"Unknown downsampling method: {method}")
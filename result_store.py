@@ -0,0 +1,87 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import logging
+
+
+class ResultStore:
+    """Disk-backed store of processed per-driver telemetry and assembled analysis responses
+
+    Rows are keyed by (year, grand_prix, session, key, version) where key is a
+    driver code for per-driver pieces or a request key for full responses.
+    Bumping the processing version makes older rows invisible without a
+    migration. SQLite in WAL mode lets every gunicorn worker share one file.
+    """
+
+    TABLES = ('driver_results', 'analysis_results')
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for table in self.TABLES:
+                conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    'year INTEGER, grand_prix TEXT, session TEXT, key TEXT, version INTEGER, '
+                    'created_at REAL, payload BLOB, '
+                    'PRIMARY KEY (year, grand_prix, session, key, version))'
+                )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _get(self, table, year, grand_prix, session, key, version, max_age=None):
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    f'SELECT created_at, payload FROM {table} '
+                    'WHERE year=? AND grand_prix=? AND session=? AND key=? AND version=?',
+                    (int(year), grand_prix, session, key, version)
+                ).fetchone()
+            if row is None or (max_age is not None and time.time() - row[0] > max_age):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return pickle.loads(row[1])
+        except Exception as e:
+            logging.warning(f"Result store read failed for {table} {key}: {e}")
+            return None
+
+    def _put(self, table, year, grand_prix, session, key, version, value):
+        try:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    f'INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (int(year), grand_prix, session, key, version, time.time(), payload)
+                )
+                conn.commit()
+        except Exception as e:
+            logging.warning(f"Result store write failed for {table} {key}: {e}")
+
+    def get_driver(self, year, grand_prix, session, driver, version, max_age=None):
+        return self._get('driver_results', year, grand_prix, session, driver, version, max_age)
+
+    def put_driver(self, year, grand_prix, session, driver, version, value):
+        self._put('driver_results', year, grand_prix, session, driver, version, value)
+
+    def get_analysis(self, year, grand_prix, session, request_key, version, max_age=None):
+        return self._get('analysis_results', year, grand_prix, session, request_key, version, max_age)
+
+    def put_analysis(self, year, grand_prix, session, request_key, version, value):
+        self._put('analysis_results', year, grand_prix, session, request_key, version, value)
+
+    def stats(self):
+        return {'path': self.path, 'hits': self.hits, 'misses': self.misses}
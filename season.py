@@ -0,0 +1,129 @@
+import os
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from session_cache import session_cache, NEEDS_LAPS
+from sector_metrics import compute_sector_metrics, SECTOR_LABELS
+
+# Season comparison settings (overridable from the environment)
+SEASON_EXECUTOR = os.environ.get("SEASON_EXECUTOR", "process")  # 'process' or 'thread'
+SEASON_WORKERS = int(os.environ.get("SEASON_WORKERS", 4))
+SEASON_MP_CONTEXT = os.environ.get("SEASON_MP_CONTEXT", "spawn")
+SEASON_MAX_DRIVERS = 6
+
+
+def round_gaps(metrics, drivers):
+    """Fastest-lap and sector gaps of drivers to the first driver, from compute_sector_metrics output"""
+    reference = metrics.get(drivers[0], {})
+    ref_lap = reference.get('best_lap')
+    ref_sectors = reference.get('best_sectors', [None] * len(SECTOR_LABELS))
+
+    def gap(value, ref):
+        return value - ref if value is not None and ref is not None else None
+
+    results = {}
+    for driver in drivers:
+        driver_metrics = metrics.get(driver)
+        if driver_metrics is None:
+            results[driver] = None
+            continue
+        results[driver] = {
+            'best_lap': driver_metrics['best_lap'],
+            'gap': gap(driver_metrics['best_lap'], ref_lap),
+            'best_sectors': driver_metrics['best_sectors'],
+            'sector_gaps': [gap(s, r) for s, r in zip(driver_metrics['best_sectors'], ref_sectors)],
+            'gap_to_session_leader': driver_metrics['gap_to_session_leader'],
+        }
+    timed = {d: r['best_lap'] for d, r in results.items() if r is not None and r['best_lap'] is not None}
+    return {
+        'reference': drivers[0],
+        'fastest': min(timed, key=timed.get) if timed else None,
+        'drivers': results,
+    }
+
+
+def compare_round(year, grand_prix, session_code, drivers):
+    """Load one round's laps in this process and compute the drivers' gaps; entry point for pool workers"""
+    session = session_cache.get(year, grand_prix, session_code, needs=NEEDS_LAPS)
+    return round_gaps(compute_sector_metrics(session.laps), drivers)
+
+
+def summarise_season(rounds, drivers):
+    """Per-driver gap statistics and head-to-head count over the rounds that completed"""
+    summary = {}
+    for driver in drivers:
+        gaps = [r['drivers'][driver]['gap'] for r in rounds
+                if r['drivers'].get(driver) and r['drivers'][driver]['gap'] is not None]
+        summary[driver] = {
+            'rounds': len(gaps),
+            'mean_gap': float(np.mean(gaps)) if gaps else None,
+            'median_gap': float(np.median(gaps)) if gaps else None,
+            'fastest_in': sum(1 for r in rounds if r['fastest'] == driver),
+        }
+    return {'reference': drivers[0], 'rounds': len(rounds), 'drivers': summary}
+
+
+class SeasonExecutor:
+    """Shared, lazily created pool that bounds how many rounds load at once across all requests
+
+    Each worker process keeps its own session cache, so repeated comparisons
+    of the same season reuse sessions already loaded by that worker.
+    """
+
+    def __init__(self, kind=SEASON_EXECUTOR, max_workers=SEASON_WORKERS):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.kind == 'process':
+                    context = multiprocessing.get_context(SEASON_MP_CONTEXT)
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='season')
+            return self._pool
+
+    def compare(self, year, rounds, session_code, drivers):
+        """Yield (round number, grand prix, result, error) as each round finishes, in completion order
+
+        Rounds still queued when the consumer stops iterating (e.g. the
+        client disconnected) are cancelled.
+        """
+        pool = self._get_pool()
+        futures = {
+            pool.submit(compare_round, year, grand_prix, session_code, drivers): (number, grand_prix)
+            for number, grand_prix in rounds
+        }
+        try:
+            for future in as_completed(futures):
+                number, grand_prix = futures[future]
+                try:
+                    yield number, grand_prix, future.result(), None
+                except Exception as e:
+                    logging.warning(f"Season comparison failed for {year} {grand_prix}: {e}")
+                    yield number, grand_prix, None, str(e)[:200]
+        finally:
+            for future in futures:
+                future.cancel()
+            if any(isinstance(f.exception(), BrokenProcessPool) for f in futures if f.done() and not f.cancelled()):
+                # A worker died (e.g. out of memory); start a fresh pool for the next request
+                self.shutdown()
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+season_executor = SeasonExecutor()
@@ -0,0 +1,70 @@
+import numpy as np
+import threading
+import weakref
+
+SECTOR_COLUMNS = ('Sector1Time', 'Sector2Time', 'Sector3Time')
+SECTOR_LABELS = ('S1', 'S2', 'S3')
+
+_metrics_cache = weakref.WeakKeyDictionary()
+_metrics_lock = threading.Lock()
+
+
+def _seconds(series):
+    return series.dt.total_seconds().values if hasattr(series, 'dt') else np.asarray(series, dtype=float)
+
+
+def compute_sector_metrics(laps):
+    """Best lap and sectors, theoretical best, strongest sector and gap to the session leader for every driver
+
+    Built from one groupby over the whole lap table. The theoretical best is
+    the sum of the driver's best sectors; the strongest sector is the one
+    where the driver's best time beats the session-wide sector mean by the
+    most.
+    """
+    import pandas as pd
+    if laps is None or len(laps) == 0 or 'Driver' not in laps:
+        return {}
+
+    frame = pd.DataFrame({'Driver': laps['Driver'].values})
+    for column, label in zip(SECTOR_COLUMNS, SECTOR_LABELS):
+        frame[label] = _seconds(laps[column]) if column in laps else np.nan
+    frame['LapTime'] = _seconds(laps['LapTime']) if 'LapTime' in laps else np.nan
+    frame = frame.dropna(subset=['Driver'])
+
+    labels = list(SECTOR_LABELS)
+    best = frame.groupby('Driver')[labels + ['LapTime']].min()
+    theoretical = best[labels].sum(axis=1, min_count=len(labels))
+
+    session_means = frame[labels].mean()
+    advantages = session_means - best[labels]
+    complete = advantages.notna().all(axis=1)
+    strongest = advantages[complete].idxmax(axis=1).reindex(best.index)
+    advantage = advantages.max(axis=1).where(complete)
+
+    leader_time = best['LapTime'].min()
+    gaps = best['LapTime'] - leader_time
+
+    def value(x):
+        return float(x) if pd.notna(x) else None
+
+    metrics = {}
+    for driver, row in best.iterrows():
+        metrics[driver] = {
+            'best_sectors': [value(row[label]) for label in labels],
+            'theoretical_best': value(theoretical[driver]),
+            'strongest_sector': strongest[driver] if pd.notna(strongest[driver]) else None,
+            'sector_advantage': value(advantage[driver]) or 0.0,
+            'gap_to_session_leader': value(gaps[driver]),
+            'best_lap': value(row['LapTime']),
+        }
+    return metrics
+
+
+def session_sector_metrics(session):
+    """Sector metrics for a loaded session, computed once and kept for as long as the session lives"""
+    with _metrics_lock:
+        metrics = _metrics_cache.get(session)
+        if metrics is None:
+            metrics = compute_sector_metrics(session.laps)
+            _metrics_cache[session] = metrics
+        return metrics
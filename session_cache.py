@@ -0,0 +1,174 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from metrics import span
+from fastf1_setup import get_fastf1
+from memory import memory_accountant
+from lap_index import lap_index_bytes
+
+# Cache limits (overridable from the environment)
+SESSION_CACHE_MAX_ENTRIES = int(os.environ.get("SESSION_CACHE_MAX_ENTRIES", 4))
+SESSION_CACHE_MAX_MB = int(os.environ.get("SESSION_CACHE_MAX_MB", 1024))
+
+# Data groups accepted by Session.load(); code paths declare the subset they need
+LOAD_FLAGS = ('laps', 'telemetry', 'weather', 'messages')
+NEEDS_DRIVERS = frozenset()  # results/driver info is always loaded
+NEEDS_LAPS = frozenset({'laps'})
+NEEDS_TELEMETRY = frozenset({'laps', 'telemetry'})
+NEEDS_ALL = frozenset(LOAD_FLAGS)
+
+
+def estimate_session_size(session):
+    """Estimate memory held by a loaded session's DataFrames in bytes"""
+    import pandas as pd
+    frames = []
+    for attr in ('laps', 'results', 'weather_data', 'race_control_messages', 'session_status', 'track_status'):
+        try:
+            frames.append(getattr(session, attr))
+        except Exception:
+            continue
+    for attr in ('car_data', 'pos_data'):
+        try:
+            frames.extend(getattr(session, attr).values())
+        except Exception:
+            continue
+
+    total = 0
+    for frame in frames:
+        if isinstance(frame, pd.DataFrame):
+            try:
+                total += int(frame.memory_usage(index=True, deep=False).sum())
+            except Exception:
+                continue
+    return total
+
+
+class SessionCache:
+    """Thread-safe LRU cache of loaded FastF1 sessions bounded by entry count and memory"""
+
+    def __init__(self, max_entries=SESSION_CACHE_MAX_ENTRIES, max_bytes=SESSION_CACHE_MAX_MB * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (session, loaded flags, size)
+        self._last_used = {}
+        self._key_locks = {}  # kept across evictions so waiters and newcomers always share one lock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_key_lock(self, key):
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def _lookup(self, key, needs, count_miss=False):
+        """Return (session, loaded flags); session is None unless it already covers needs
+
+        Hits, and misses when count_miss is set, are counted under the same
+        lock as the lookup itself.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            session, loaded = None, frozenset()
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._last_used[key] = time.time()
+                cached, loaded, _ = entry
+                if needs <= loaded:
+                    session = cached
+            if session is not None:
+                self.hits += 1
+            elif count_miss:
+                self.misses += 1
+            return session, loaded
+
+    def _store(self, key, session, loaded):
+        size = estimate_session_size(session)
+        with self._lock:
+            self._entries[key] = (session, loaded, size)
+            self._entries.move_to_end(key)
+            self._last_used[key] = time.time()
+            self._evict()
+        memory_accountant.enforce()
+
+    def _evict(self):
+        """Drop least recently used entries until both limits are met (caller holds the lock)"""
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self.total_bytes() > self.max_bytes
+        ):
+            key, _ = self._entries.popitem(last=False)
+            self._last_used.pop(key, None)
+            self.evictions += 1
+            logging.info(f"Evicted session {key} from session cache")
+
+    def total_bytes(self):
+        return sum(size + lap_index_bytes(session) for session, _, size in self._entries.values())
+
+    def get(self, year, grand_prix, session_code, needs=NEEDS_ALL):
+        """Return a session loaded with at least the requested data groups
+
+        A cached session that is missing some of the requested groups is
+        upgraded by loading a fresh Session with the union of both sets, so
+        callers already holding the old object are never mutated under them.
+        """
+        key = (int(year), grand_prix, session_code)
+        needs = frozenset(needs)
+
+        session, _ = self._lookup(key, needs)
+        if session is not None:
+            return session
+
+        with self._get_key_lock(key):
+            # Another thread may have finished loading while we waited on the key lock
+            session, loaded = self._lookup(key, needs, count_miss=True)
+            if session is not None:
+                return session
+
+            flags = needs | loaded
+            logging.info(f"Loading session {key} with {sorted(flags) or 'driver info only'}")
+            with span('session_load'):
+                session = get_fastf1().get_session(year, grand_prix, session_code)
+                session.load(**{flag: flag in flags for flag in LOAD_FLAGS})
+            self._store(key, session, flags)
+            return session
+
+    def memory_entries(self):
+        with self._lock:
+            entries = [(key, session, size) for key, (session, _, size) in self._entries.items()]
+            last_used = dict(self._last_used)
+        # The session's DataFrames plus any lap index built over them since it was stored
+        return [(key, size + lap_index_bytes(session), last_used.get(key, 0)) for key, session, size in entries]
+
+    def evict(self, key):
+        """Drop one session for the global memory budget; requests already holding it keep their reference"""
+        with self._lock:
+            if self._entries.pop(key, None) is None:
+                return False
+            self._last_used.pop(key, None)
+            self.evictions += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._last_used.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes(),
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+session_cache = SessionCache()
+memory_accountant.register('sessions', session_cache)
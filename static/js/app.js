@@ -1,8 +1,53 @@
 // Track.lytix - Main Application Logic
+const FRAMES_MIMETYPE = 'application/vnd.tracklytix.frames';
+const FRAME_ARRAY_TYPES = {
+    float32: Float32Array,
+    int8: Int8Array,
+    uint8: Uint8Array
+};
+
+// Decode the binary frames format: JSON header plus 8-byte aligned typed-array columns
+function decodeAnalysisFrames(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+    if (magic !== 'TLX1') {
+        throw new Error('Unexpected analysis frame format');
+    }
+
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const base = Math.ceil((8 + headerLength) / 8) * 8;
+    const columns = header.columns.map(column =>
+        new FRAME_ARRAY_TYPES[column.dtype](buffer, base + column.offset, column.length)
+    );
+
+    Object.values(header.telemetry).forEach(channels => {
+        Object.keys(channels).forEach(channel => {
+            channels[channel] = columns[channels[channel].$column];
+        });
+    });
+    // Whole-field matrices become one typed-array view per driver row
+    Object.entries(header.matrix || {}).forEach(([channel, value]) => {
+        if (value === null || value.$column === undefined) return;
+        const column = header.columns[value.$column];
+        const values = columns[value.$column];
+        if (!column.shape) {
+            header.matrix[channel] = values;
+            return;
+        }
+        const width = column.shape[1];
+        header.matrix[channel] = Array.from({length: column.shape[0]}, (_, row) =>
+            values.subarray(row * width, (row + 1) * width));
+    });
+    delete header.columns;
+    return header;
+}
+
 class TrackLytix {
     constructor() {
         this.selectedDrivers = new Set();
         this.currentData = null;
+        this.trackGeometries = new Map();
         this.charts = {};
         this.trackCanvas = null;
         this.trackCtx = null;
@@ -209,24 +254,12 @@ class TrackLytix {
         this.showDashboard(false);
 
         try {
-            const response = await fetch('/generate_analysis', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    year: parseInt(year),
-                    grand_prix: grandPrix,
-                    session: session,
-                    drivers: drivers
-                })
+            const data = await this.runAnalysis({
+                year: parseInt(year),
+                grand_prix: grandPrix,
+                session: session,
+                drivers: drivers
             });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-
-            const data = await response.json();
             this.currentData = data;
             
             this.renderDashboard(data);
@@ -242,6 +275,29 @@ class TrackLytix {
         }
     }
 
+    async runAnalysis(payload) {
+        // Blocking request: any web worker can answer it, unlike background jobs which live in one
+        // worker's memory. Prefer compact binary columns; the server falls back to JSON otherwise
+        const response = await fetch('/generate_analysis', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': `${FRAMES_MIMETYPE}, application/json;q=0.9`
+            },
+            body: JSON.stringify(payload)
+        });
+        if (!response.ok) {
+            const failure = await response.json().catch(() => ({}));
+            throw new Error(failure.error || `HTTP error! status: ${response.status}`);
+        }
+
+        const contentType = response.headers.get('Content-Type') || '';
+        if (contentType.startsWith(FRAMES_MIMETYPE)) {
+            return decodeAnalysisFrames(await response.arrayBuffer());
+        }
+        return response.json();
+    }
+
     renderDashboard(data) {
         // Render track visualization
         this.renderTrackDominance(data);
@@ -260,30 +316,65 @@ class TrackLytix {
         this.toggleRaceSpecificSections(session === 'Race');
     }
 
-    renderTrackDominance(data) {
-        if (!this.trackCtx || !data.fastest_minisectors) return;
+    async loadTrackGeometry(ref) {
+        // Outlines are per circuit layout, so they are fetched once and reused across analyses
+        const url = `${ref.url}?lod=${ref.default_level}`;
+        if (!this.trackGeometries.has(url)) {
+            this.trackGeometries.set(url, fetch(url).then(response => {
+                if (!response.ok) throw new Error(`Track geometry request failed (${response.status})`);
+                return response.json();
+            }));
+        }
+        try {
+            return await this.trackGeometries.get(url);
+        } catch (error) {
+            this.trackGeometries.delete(url);
+            throw error;
+        }
+    }
+
+    // Outline points between two lap distances (metres), with interpolated end points
+    outlineSegment(outline, from, to) {
+        const {x, y, distance} = outline;
+        const pointAt = d => {
+            let i = 1;
+            while (i < distance.length - 1 && distance[i] < d) i++;
+            const span = distance[i] - distance[i - 1];
+            const t = span > 0 ? Math.min(Math.max((d - distance[i - 1]) / span, 0), 1) : 0;
+            return [x[i - 1] + t * (x[i] - x[i - 1]), y[i - 1] + t * (y[i] - y[i - 1])];
+        };
+        const points = [pointAt(from)];
+        for (let i = 0; i < distance.length; i++) {
+            if (distance[i] > from && distance[i] < to) points.push([x[i], y[i]]);
+        }
+        points.push(pointAt(to));
+        return points;
+    }
+
+    async renderTrackDominance(data) {
+        if (!this.trackCtx || !data.fastest_minisectors || !data.track_geometry) return;
+
+        let geometry;
+        try {
+            geometry = await this.loadTrackGeometry(data.track_geometry);
+        } catch (error) {
+            console.error('Error loading track geometry:', error);
+            return;
+        }
+        // A newer analysis may have been rendered while the outline loaded
+        if (this.currentData !== data) return;
 
         const canvas = this.trackCanvas;
         const ctx = this.trackCtx;
+        const outline = geometry.outline;
         
         // Clear canvas
         ctx.fillStyle = '#0a0a0a';
         ctx.fillRect(0, 0, canvas.width, canvas.height);
 
-        // Get all coordinates to calculate bounds
-        let minX = Infinity, maxX = -Infinity;
-        let minY = Infinity, maxY = -Infinity;
-
-        data.fastest_minisectors.forEach(sector => {
-            sector.coords.x.forEach(x => {
-                minX = Math.min(minX, x);
-                maxX = Math.max(maxX, x);
-            });
-            sector.coords.y.forEach(y => {
-                minY = Math.min(minY, y);
-                maxY = Math.max(maxY, y);
-            });
-        });
+        // Bounds of the circuit outline
+        const minX = Math.min(...outline.x), maxX = Math.max(...outline.x);
+        const minY = Math.min(...outline.y), maxY = Math.max(...outline.y);
 
         // Calculate scale and offset
         const padding = 50;
@@ -294,51 +385,55 @@ class TrackLytix {
         const offsetX = (canvas.width - (maxX - minX) * scale) / 2 - minX * scale;
         const offsetY = (canvas.height - (maxY - minY) * scale) / 2 - minY * scale;
 
-        // Draw track base
-        ctx.strokeStyle = '#333333';
-        ctx.lineWidth = 8;
         ctx.lineCap = 'round';
         ctx.lineJoin = 'round';
 
-        // Draw mini-sectors with driver colors
+        // Draw mini-sectors with driver colors; sector bounds are fractions of the lap
         data.fastest_minisectors.forEach(sector => {
-            if (sector.coords.x.length < 2) return;
+            const points = this.outlineSegment(outline, sector.start * geometry.length, sector.end * geometry.length);
 
             ctx.strokeStyle = sector.color;
             ctx.lineWidth = 6;
             ctx.beginPath();
-
-            for (let i = 0; i < sector.coords.x.length; i++) {
-                const x = sector.coords.x[i] * scale + offsetX;
-                const y = sector.coords.y[i] * scale + offsetY;
-
+            points.forEach(([px, py], i) => {
+                const x = px * scale + offsetX;
+                const y = py * scale + offsetY;
                 if (i === 0) {
                     ctx.moveTo(x, y);
                 } else {
                     ctx.lineTo(x, y);
                 }
-            }
+            });
             ctx.stroke();
         });
 
+        // Corner numbers, when the circuit data was available
+        ctx.fillStyle = '#bbbbbb';
+        ctx.font = '11px sans-serif';
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'middle';
+        (geometry.corners || []).forEach(corner => {
+            const angle = corner.angle * Math.PI / 180;
+            const x = corner.x * scale + offsetX + Math.cos(angle) * 16;
+            const y = corner.y * scale + offsetY + Math.sin(angle) * 16;
+            ctx.fillText(`${corner.number}${corner.letter}`, x, y);
+        });
+
         // Add start/finish line
-        if (data.fastest_minisectors.length > 0) {
-            const firstSector = data.fastest_minisectors[0];
-            if (firstSector.coords.x.length > 0) {
-                const startX = firstSector.coords.x[0] * scale + offsetX;
-                const startY = firstSector.coords.y[0] * scale + offsetY;
-
-                ctx.strokeStyle = '#ffffff';
-                ctx.lineWidth = 3;
-                ctx.setLineDash([10, 5]);
-                ctx.beginPath();
-                ctx.moveTo(startX - 15, startY - 15);
-                ctx.lineTo(startX + 15, startY + 15);
-                ctx.moveTo(startX - 15, startY + 15);
-                ctx.lineTo(startX + 15, startY - 15);
-                ctx.stroke();
-                ctx.setLineDash([]);
-            }
+        if (outline.x.length > 0) {
+            const startX = outline.x[0] * scale + offsetX;
+            const startY = outline.y[0] * scale + offsetY;
+
+            ctx.strokeStyle = '#ffffff';
+            ctx.lineWidth = 3;
+            ctx.setLineDash([10, 5]);
+            ctx.beginPath();
+            ctx.moveTo(startX - 15, startY - 15);
+            ctx.lineTo(startX + 15, startY + 15);
+            ctx.moveTo(startX - 15, startY + 15);
+            ctx.lineTo(startX + 15, startY - 15);
+            ctx.stroke();
+            ctx.setLineDash([]);
         }
     }
 
@@ -458,6 +553,9 @@ class TrackLytix {
         // Throttle & Brake Chart
         this.renderThrottleBrakeChart(data);
         
+        // Lap Delta Chart
+        this.renderDeltaChart(data);
+        
         // Gear Strategy Chart
         this.renderGearChart(data);
         
@@ -480,7 +578,7 @@ class TrackLytix {
 
         const datasets = Object.entries(data.telemetry).map(([driver, telemetry]) => ({
             label: driver,
-            data: telemetry.Distance.map((dist, i) => ({
+            data: Array.from(telemetry.Distance, (dist, i) => ({
                 x: dist * 100, // Convert to percentage
                 y: telemetry.Speed[i]
             })),
@@ -526,6 +624,72 @@ class TrackLytix {
         });
     }
 
+    renderDeltaChart(data) {
+        const canvas = document.getElementById('deltaChart');
+        if (!canvas) return;
+        const ctx = canvas.getContext('2d');
+        
+        if (this.charts.deltaChart) {
+            this.charts.deltaChart.destroy();
+        }
+
+        const referenceEl = document.getElementById('delta-reference');
+        if (referenceEl) {
+            referenceEl.textContent = data.delta_reference ? `vs ${data.delta_reference}` : '';
+        }
+
+        const datasets = Object.entries(data.telemetry)
+            .filter(([, telemetry]) => telemetry.Delta)
+            .map(([driver, telemetry]) => ({
+                label: driver,
+                data: Array.from(telemetry.Distance, (dist, i) => ({
+                    x: dist * 100,
+                    y: telemetry.Delta[i]
+                })),
+                borderColor: data.driver_colors[driver],
+                backgroundColor: data.driver_colors[driver] + '20',
+                borderWidth: 2,
+                pointRadius: 0,
+                fill: false,
+                tension: 0.1
+            }));
+
+        this.charts.deltaChart = new Chart(ctx, {
+            type: 'line',
+            data: { datasets },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    legend: {
+                        labels: { color: '#ffffff' }
+                    }
+                },
+                scales: {
+                    x: {
+                        type: 'linear',
+                        title: {
+                            display: true,
+                            text: 'Track Position (%)',
+                            color: '#ffffff'
+                        },
+                        ticks: { color: '#cccccc' },
+                        grid: { color: '#333333' }
+                    },
+                    y: {
+                        title: {
+                            display: true,
+                            text: 'Delta (s)',
+                            color: '#ffffff'
+                        },
+                        ticks: { color: '#cccccc' },
+                        grid: { color: '#333333' }
+                    }
+                }
+            }
+        });
+    }
+
     renderThrottleBrakeChart(data) {
         const ctx = document.getElementById('throttleBrakeChart').getContext('2d');
         
@@ -539,7 +703,7 @@ class TrackLytix {
         Object.entries(data.telemetry).forEach(([driver, telemetry]) => {
             datasets.push({
                 label: `${driver} Throttle`,
-                data: telemetry.Distance.map((dist, i) => ({
+                data: Array.from(telemetry.Distance, (dist, i) => ({
                     x: dist * 100,
                     y: telemetry.Throttle[i]
                 })),
@@ -552,7 +716,7 @@ class TrackLytix {
             
             datasets.push({
                 label: `${driver} Brake`,
-                data: telemetry.Distance.map((dist, i) => ({
+                data: Array.from(telemetry.Distance, (dist, i) => ({
                     x: dist * 100,
                     y: telemetry.Brake[i] ? 100 : 0
                 })),
@@ -623,7 +787,7 @@ class TrackLytix {
 
         const datasets = Object.entries(data.telemetry).map(([driver, telemetry]) => ({
             label: driver,
-            data: telemetry.Distance.map((dist, i) => ({
+            data: Array.from(telemetry.Distance, (dist, i) => ({
                 x: dist * 100,
                 y: telemetry.Gear[i]
             })),
@@ -755,9 +919,10 @@ class TrackLytix {
 
         const datasets = Object.entries(data.lap_by_lap_data || {}).map(([driver, laps]) => ({
             label: driver,
-            data: laps.map(lap => ({
-                x: lap.lap_number,
-                y: lap.lap_time
+            // lap_by_lap_data is columnar: parallel arrays per driver
+            data: Array.from(laps.lap_number || [], (lapNumber, i) => ({
+                x: lapNumber,
+                y: laps.lap_time[i]
             })),
             borderColor: data.driver_colors[driver],
             backgroundColor: data.driver_colors[driver] + '20',
@@ -879,6 +1044,16 @@ class TrackLytix {
     showLoadingState(show) {
         const loading = document.getElementById('loading-section');
         loading.style.display = show ? 'block' : 'none';
+        if (show) {
+            this.showLoadingStage('Analyzing F1 data and generating insights');
+        }
+    }
+
+    showLoadingStage(stage) {
+        const stageEl = document.getElementById('loading-stage');
+        if (stageEl) {
+            stageEl.textContent = stage.charAt(0).toUpperCase() + stage.slice(1);
+        }
     }
 
     showError(message) {
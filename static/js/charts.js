@@ -37,7 +37,7 @@ class ChartManager {
 
             return {
                 label: driver,
-                data: telemetry.Distance.map((dist, i) => ({
+                data: Array.from(telemetry.Distance, (dist, i) => ({
                     x: dist * 100,
                     y: telemetry.Speed[i]
                 })),
@@ -180,7 +180,7 @@ class ChartManager {
 
             datasets.push({
                 label: `${driver} Throttle`,
-                data: telemetry.Distance.map((dist, i) => ({
+                data: Array.from(telemetry.Distance, (dist, i) => ({
                     x: dist * 100,
                     y: telemetry.Throttle[i]
                 })),
@@ -194,7 +194,7 @@ class ChartManager {
 
             datasets.push({
                 label: `${driver} Brake`,
-                data: telemetry.Distance.map((dist, i) => ({
+                data: Array.from(telemetry.Distance, (dist, i) => ({
                     x: dist * 100,
                     y: telemetry.Brake[i] ? 100 : 0
                 })),
@@ -495,9 +495,9 @@ class ChartManager {
             
             return {
                 label: driver,
-                data: laps.map(lap => ({
-                    x: lap.lap_number,
-                    y: lap.lap_time
+                data: Array.from(laps.lap_number || [], (lapNumber, i) => ({
+                    x: lapNumber,
+                    y: laps.lap_time[i]
                 })),
                 borderColor: driverColor,
                 backgroundColor: driverColor + '20',
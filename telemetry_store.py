@@ -0,0 +1,200 @@
+import os
+import json
+import shutil
+import threading
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+from lap_index import session_lap_index
+from warmup import acquire_startup_lock
+
+# Exported lap telemetry settings (overridable from the environment)
+TELEMETRY_STORE_EXPORT_ON_LOAD = os.environ.get("TELEMETRY_STORE_EXPORT_ON_LOAD", "0") == "1"
+TELEMETRY_STORE_OPEN_SESSIONS = int(os.environ.get("TELEMETRY_STORE_OPEN_SESSIONS", 32))
+TELEMETRY_STORE_FORMAT = 2  # bump when the on-disk layout or channel set changes
+
+# Stored channel -> on-disk dtype, named like LapIndex.laps() output
+STORE_CHANNELS = {
+    'Time': np.float32,  # seconds since the start of the lap
+    'Distance': np.float32,
+    'X': np.float32,
+    'Y': np.float32,
+    'Speed': np.float32,
+    'Throttle': np.float32,
+    'Brake': np.uint8,
+    'Gear': np.int8,
+}
+
+
+def _slug(text):
+    return ''.join(c if c.isalnum() else '_' for c in str(text))
+
+
+class SessionTelemetry:
+    """Read-only view of one exported session; every channel is a np.memmap shared through the page cache"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'index.json')) as f:
+            self.index = json.load(f)
+        self.channels = {
+            name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+            for name in self.index['channels']
+        }
+        # (driver, lap number) -> (start, length) into every channel array
+        self._laps = {(lap['driver'], lap['lap']): (lap['start'], lap['length']) for lap in self.index['laps']}
+
+    def drivers(self):
+        return sorted({driver for driver, _ in self._laps})
+
+    def lap_numbers(self, driver):
+        return sorted(lap for d, lap in self._laps if d == driver)
+
+    def has_lap(self, driver, lap_number):
+        return (driver, int(lap_number)) in self._laps
+
+    def lap(self, driver, lap_number):
+        """Channels of one lap as zero-copy memmap slices, or None if the lap was not exported"""
+        entry = self._laps.get((driver, int(lap_number)))
+        if entry is None:
+            return None
+        start, length = entry
+        return {name: values[start:start + length] for name, values in self.channels.items()}
+
+
+class TelemetryStore:
+    """Per-session columnar lap telemetry exported from loaded FastF1 sessions
+
+    Each session directory holds one .npy file per channel with every
+    exported lap of every driver concatenated, plus index.json mapping
+    (driver, lap) to a (start, length) slice. Exports are written to a
+    temporary directory and renamed into place, so concurrent workers never
+    see a partial session and the first finished export wins.
+    """
+
+    def __init__(self, path, max_open=TELEMETRY_STORE_OPEN_SESSIONS):
+        self.path = path
+        self.max_open = max_open
+        self._open = OrderedDict()
+        self._exporting = set()
+        self._lock = threading.Lock()
+
+    def session_path(self, year, grand_prix, session_code):
+        return os.path.join(self.path, f'v{TELEMETRY_STORE_FORMAT}', str(int(year)), _slug(grand_prix), _slug(session_code))
+
+    def has_session(self, year, grand_prix, session_code):
+        return os.path.exists(os.path.join(self.session_path(year, grand_prix, session_code), 'index.json'))
+
+    def open(self, year, grand_prix, session_code):
+        """Memory-mapped view of an exported session, or None if it has not been exported"""
+        key = (int(year), grand_prix, session_code)
+        with self._lock:
+            if key in self._open:
+                self._open.move_to_end(key)
+                return self._open[key]
+        if not self.has_session(year, grand_prix, session_code):
+            return None
+        try:
+            view = SessionTelemetry(self.session_path(year, grand_prix, session_code))
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable telemetry export for {key}: {e}")
+            return None
+        with self._lock:
+            self._open[key] = view
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return view
+
+    def stats(self):
+        """Open sessions and bytes mapped by this process (page cache shared with other workers, not heap)"""
+        with self._lock:
+            views = list(self._open.items())
+        return {
+            'open_sessions': len(views),
+            'mapped_bytes': sum(values.nbytes for _, view in views for values in view.channels.values()),
+        }
+
+    def export(self, session, year, grand_prix, session_code):
+        """Write every lap of every driver in a telemetry-loaded session; returns the number of laps
+
+        Laps are gathered per driver through the session's LapIndex. A lock
+        file next to the session directory makes other workers skip an
+        export that is already running on this host.
+        """
+        target = self.session_path(year, grand_prix, session_code)
+        if os.path.exists(os.path.join(target, 'index.json')):
+            return 0
+        parent = os.path.dirname(target)
+        os.makedirs(parent, exist_ok=True)
+        lock_file = acquire_startup_lock(os.path.join(parent, f'.{os.path.basename(target)}.lock'))
+        if lock_file is None:
+            logging.info(f"Telemetry export for {(year, grand_prix, session_code)} already running in another worker")
+            return 0
+        try:
+            return self._export(session, target, year, grand_prix, session_code)
+        finally:
+            lock_file.close()
+
+    def _export(self, session, target, year, grand_prix, session_code):
+        if os.path.exists(os.path.join(target, 'index.json')):
+            return 0
+        index = session_lap_index(session)
+        columns = {name: [] for name in STORE_CHANNELS}
+        laps_index = []
+        offset = 0
+        for driver in session.laps['Driver'].dropna().unique():
+            try:
+                driver_laps = index.laps(driver, index.lap_numbers(driver))
+            except Exception as e:
+                logging.debug(f"Skipping laps of {driver}: {e}")
+                continue
+            for lap_number, telemetry in driver_laps.items():
+                length = len(telemetry['Time'])
+                for name, dtype in STORE_CHANNELS.items():
+                    columns[name].append(np.asarray(telemetry[name], dtype=dtype))
+                laps_index.append({'driver': driver, 'lap': int(lap_number), 'start': offset, 'length': length})
+                offset += length
+
+        if not laps_index:
+            raise ValueError("no lap telemetry to export")
+
+        parent = os.path.dirname(target)
+        staging = os.path.join(parent, f'.{os.path.basename(target)}.{os.getpid()}.{threading.get_ident()}')
+        os.makedirs(staging, exist_ok=True)
+        try:
+            for name, parts in columns.items():
+                np.save(os.path.join(staging, f'{name}.npy'), np.concatenate(parts))
+            with open(os.path.join(staging, 'index.json'), 'w') as f:
+                json.dump({'format': TELEMETRY_STORE_FORMAT, 'channels': list(STORE_CHANNELS), 'laps': laps_index}, f)
+            os.rename(staging, target)
+        except OSError:
+            # Another worker finished the same export first
+            shutil.rmtree(staging, ignore_errors=True)
+            if not self.has_session(year, grand_prix, session_code):
+                raise
+            return 0
+        logging.info(f"Exported {len(laps_index)} laps of telemetry for {(year, grand_prix, session_code)}")
+        return len(laps_index)
+
+    def export_in_background(self, session, year, grand_prix, session_code):
+        """Export on a daemon thread unless this session is already exported or being exported"""
+        key = (int(year), grand_prix, session_code)
+        with self._lock:
+            if key in self._exporting or self.has_session(year, grand_prix, session_code):
+                return None
+            self._exporting.add(key)
+
+        def run():
+            try:
+                self.export(session, year, grand_prix, session_code)
+            except Exception as e:
+                logging.error(f"Telemetry export failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._exporting.discard(key)
+
+        thread = threading.Thread(target=run, name='telemetry-export', daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,234 @@
+import os
+import json
+import threading
+import logging
+
+import numpy as np
+
+# Circuit geometry settings (overridable from the environment)
+TRACK_GEOMETRY_STEP_M = float(os.environ.get("TRACK_GEOMETRY_STEP_M", 2.0))
+TRACK_GEOMETRY_LAYOUT_TOLERANCE_M = float(os.environ.get("TRACK_GEOMETRY_LAYOUT_TOLERANCE_M", 150.0))
+TRACK_GEOMETRY_FORMAT = 1  # bump when the stored geometry changes
+
+# Level of detail -> Ramer-Douglas-Peucker tolerance in position units (1/10 m)
+GEOMETRY_LEVELS = {
+    'high': 2.0,
+    'medium': 10.0,
+    'low': 40.0,
+}
+DEFAULT_LEVEL = 'medium'
+
+
+def _slug(text):
+    return ''.join(c if c.isalnum() else '_' for c in str(text))
+
+
+def simplify_rdp(x, y, tolerance):
+    """Indices of the vertices kept by Ramer-Douglas-Peucker at the given tolerance, first and last always kept"""
+    n = len(x)
+    if n < 3:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        px = x[start + 1:end] - x[start]
+        py = y[start + 1:end] - y[start]
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        norm = np.hypot(dx, dy)
+        if norm == 0:
+            # Closed loop: fall back to distance from the shared endpoint
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(dy * px - dx * py) / norm
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return np.flatnonzero(keep)
+
+
+def reference_outline(x, y, distance, step=TRACK_GEOMETRY_STEP_M):
+    """Resample one lap's X/Y onto a uniform lap-distance grid (metres) from the start/finish line"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    distance = np.asarray(distance, dtype=float)
+    mask = np.isfinite(x) & np.isfinite(y) & np.isfinite(distance)
+    x, y, distance = x[mask], y[mask], distance[mask]
+    order = np.argsort(distance, kind='stable')
+    x, y, distance = x[order], y[order], distance[order]
+    if len(distance) < 2 or distance[-1] <= distance[0]:
+        raise ValueError("not enough position samples for a track outline")
+    grid = np.arange(0.0, distance[-1], step)
+    grid = np.append(grid, distance[-1])
+    return np.interp(grid, distance, x), np.interp(grid, distance, y), grid
+
+
+def _project_markers(markers, x, y, distance):
+    """Place circuit markers on the outline by their nearest outline vertex"""
+    projected = []
+    for marker in markers:
+        nearest = int(np.argmin((x - marker['X']) ** 2 + (y - marker['Y']) ** 2))
+        projected.append({
+            'number': int(marker['Number']),
+            'letter': str(marker['Letter'] or ''),
+            'angle': float(marker['Angle']),
+            'x': float(marker['X']),
+            'y': float(marker['Y']),
+            'distance': float(distance[nearest]),
+        })
+    return sorted(projected, key=lambda marker: marker['distance'])
+
+
+def circuit_markers(session):
+    """Corners, marshal sectors and map rotation for a loaded session, or None when unavailable (e.g. offline)
+
+    Uses the MultiViewer circuit data directly rather than
+    Session.get_circuit_info, which needs car telemetry loaded to place the
+    markers; the markers are projected onto the stored outline instead.
+    """
+    try:
+        from fastf1.mvapi import get_circuit_info
+        circuit_key = session.session_info['Meeting']['Circuit']['Key']
+        info = get_circuit_info(year=session.event.year, circuit_key=circuit_key)
+    except Exception as e:
+        logging.warning(f"Circuit info unavailable: {e}")
+        return None
+    if info is None:
+        return None
+    return {
+        'corners': info.corners.to_dict('records'),
+        'marshal_sectors': info.marshal_sectors.to_dict('records'),
+        'rotation': float(info.rotation),
+    }
+
+
+def build_geometry(x, y, distance, markers=None):
+    """Reference outline, simplified levels of detail and marker distances for one circuit layout"""
+    ref_x, ref_y, ref_distance = reference_outline(x, y, distance)
+    levels = {}
+    for name, tolerance in GEOMETRY_LEVELS.items():
+        keep = simplify_rdp(ref_x, ref_y, tolerance)
+        levels[name] = {
+            'x': np.round(ref_x[keep], 1).tolist(),
+            'y': np.round(ref_y[keep], 1).tolist(),
+            'distance': np.round(ref_distance[keep], 1).tolist(),
+        }
+    return {
+        'format': TRACK_GEOMETRY_FORMAT,
+        'length': float(ref_distance[-1]),
+        'rotation': markers['rotation'] if markers else 0.0,
+        'corners': _project_markers(markers['corners'], ref_x, ref_y, ref_distance) if markers else [],
+        'marshal_sectors': _project_markers(markers['marshal_sectors'], ref_x, ref_y, ref_distance) if markers else [],
+        'has_markers': markers is not None,
+        'levels': levels,
+    }
+
+
+class TrackGeometryStore:
+    """One geometry per circuit layout, shared across drivers, sessions and seasons
+
+    A circuit is identified by its Grand Prix name and a layout by its lap
+    length: a lap within TRACK_GEOMETRY_LAYOUT_TOLERANCE_M of a stored
+    layout reuses it, anything else (a reconfigured track) gets a new one.
+    Geometries are small JSON files under path/v<format>/<circuit>/<length>.json
+    and stay in memory once read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._geometries = {}
+        self._marker_attempts = set()
+        self._lock = threading.Lock()
+
+    def _circuit_dir(self, circuit):
+        return os.path.join(self.path, f'v{TRACK_GEOMETRY_FORMAT}', _slug(circuit))
+
+    def _layouts(self, circuit):
+        try:
+            names = os.listdir(self._circuit_dir(circuit))
+        except OSError:
+            return []
+        return [int(name[:-5]) for name in names if name.endswith('.json') and name[:-5].isdigit()]
+
+    def key(self, circuit, layout):
+        return f'{_slug(circuit)}-{int(layout)}'
+
+    def load(self, key):
+        """Geometry by key, or None if it has not been built"""
+        with self._lock:
+            geometry = self._geometries.get(key)
+        if geometry is not None:
+            return geometry
+        circuit, _, layout = key.rpartition('-')
+        if not circuit or not layout.isdigit() or _slug(circuit) != circuit:
+            return None
+        try:
+            with open(os.path.join(self._circuit_dir(circuit), f'{layout}.json')) as f:
+                geometry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._geometries[key] = geometry
+        return geometry
+
+    def find(self, circuit, lap_length):
+        """Key of the stored layout closest to lap_length within tolerance, or None"""
+        layouts = [layout for layout in self._layouts(circuit)
+                   if abs(layout - lap_length) <= TRACK_GEOMETRY_LAYOUT_TOLERANCE_M]
+        if not layouts:
+            return None
+        return self.key(circuit, min(layouts, key=lambda layout: abs(layout - lap_length)))
+
+    def get_or_build(self, circuit, x, y, distance, markers=None):
+        """Key of this lap's circuit layout, building and storing it on first use
+
+        markers is an optional callable returning circuit_markers() output.
+        A layout stored without markers (built when no session was loaded or
+        circuit info was unreachable) is rebuilt when markers can be fetched,
+        trying at most once per layout per process.
+        """
+        lap_length = float(np.nanmax(distance))
+        key = self.find(circuit, lap_length)
+        geometry = self.load(key) if key is not None else None
+        if geometry is not None and (geometry['has_markers'] or markers is None):
+            return key
+        key = key or self.key(circuit, round(lap_length))
+
+        marker_data = None
+        if markers is not None:
+            with self._lock:
+                attempted = key in self._marker_attempts
+                self._marker_attempts.add(key)
+            if attempted and geometry is not None:
+                return key
+            marker_data = markers()
+            if marker_data is None and geometry is not None:
+                return key
+
+        geometry = build_geometry(x, y, distance, marker_data)
+        circuit_dir = self._circuit_dir(circuit)
+        os.makedirs(circuit_dir, exist_ok=True)
+        target = os.path.join(circuit_dir, f"{key.rpartition('-')[2]}.json")
+        staging = f'{target}.{os.getpid()}.{threading.get_ident()}'
+        with open(staging, 'w') as f:
+            json.dump(geometry, f)
+        os.replace(staging, target)
+        with self._lock:
+            self._geometries[key] = geometry
+        logging.info(f"Stored track geometry {key} ({geometry['length']:.0f} m, markers={geometry['has_markers']})")
+        return key
+
+    def level(self, key, level=DEFAULT_LEVEL):
+        """Geometry with only the requested outline level of detail, or None if unknown"""
+        geometry = self.load(key)
+        if geometry is None or level not in geometry['levels']:
+            return None
+        response = {k: v for k, v in geometry.items() if k != 'levels'}
+        response.update(key=key, level=level, levels=list(geometry['levels']), outline=geometry['levels'][level])
+        return response
@@ -0,0 +1,134 @@
+import os
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Warm-up settings (overridable from the environment)
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "0") == "1"
+WARMUP_CONCURRENCY = int(os.environ.get("WARMUP_CONCURRENCY", 2))
+WARMUP_TARGETS = os.environ.get("WARMUP_TARGETS", "")  # "2024|Bahrain Grand Prix|Race;2024|Monaco Grand Prix|Qualifying"
+WARMUP_YEARS = os.environ.get("WARMUP_YEARS", "")  # "2024,2023" walks the calendar for those seasons
+
+
+def parse_targets(spec):
+    """Parse 'year|Grand Prix|Session' entries separated by ';' into tuples"""
+    targets = []
+    for entry in spec.split(';'):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = [p.strip() for p in entry.split('|')]
+        if len(parts) != 3:
+            raise ValueError(f"Invalid warm-up target: {entry!r}")
+        targets.append((int(parts[0]), parts[1], parts[2]))
+    return targets
+
+
+def parse_years(spec):
+    return [int(y) for y in spec.split(',') if y.strip()]
+
+
+class WarmupJob:
+    """Run a warm-up function over (year, grand_prix, session) targets with bounded concurrency
+
+    targets may be a callable returning the targets, so that resolving them
+    (which can itself hit FastF1) happens inside run() rather than at import.
+    Progress is kept on the job (see progress()) and logged as each target
+    finishes, so both the CLI and the startup thread can report it.
+    """
+
+    def __init__(self, targets, warm_fn, concurrency=WARMUP_CONCURRENCY):
+        self.targets = targets if callable(targets) else list(targets)
+        self.warm_fn = warm_fn
+        self.concurrency = max(1, concurrency)
+        self.completed = 0
+        self.failed = []
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def run(self, on_progress=None):
+        self.started_at = time.time()
+        if callable(self.targets):
+            self.targets = list(self.targets())
+        total = len(self.targets)
+        logging.info(f"Warm-up started for {total} sessions with concurrency {self.concurrency}")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='warmup') as pool:
+            futures = {pool.submit(self._warm_one, target): target for target in self.targets}
+            for future in as_completed(futures):
+                target = futures[future]
+                ok, elapsed, message = future.result()
+                with self._lock:
+                    self.completed += 1
+                    if not ok:
+                        self.failed.append({'target': list(target), 'error': message})
+                    done = self.completed
+                line = f"Warm-up {done}/{total}: {target[0]} {target[1]} {target[2]} {'ok' if ok else 'failed'} in {elapsed:.1f}s"
+                if not ok:
+                    line += f" ({message})"
+                logging.info(line)
+                if on_progress:
+                    on_progress(line)
+
+        self.finished_at = time.time()
+        logging.info(f"Warm-up finished: {total - len(self.failed)} ok, {len(self.failed)} failed")
+        return self.progress()
+
+    def _warm_one(self, target):
+        start = time.time()
+        try:
+            message = self.warm_fn(*target)
+            return True, time.time() - start, message
+        except Exception as e:
+            return False, time.time() - start, str(e)[:200]
+
+    def progress(self):
+        with self._lock:
+            return {
+                'total': 0 if callable(self.targets) else len(self.targets),
+                'completed': self.completed,
+                'failed': list(self.failed),
+                'running': self.started_at is not None and self.finished_at is None,
+                'elapsed': (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0,
+            }
+
+
+def acquire_startup_lock(path):
+    """Return an open lock file if this process may run the startup warm-up, else None
+
+    Every gunicorn worker imports the app, but only one per host should warm
+    the shared caches.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return open(path, 'w')
+    lock_file = open(path, 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return lock_file
+    except OSError:
+        lock_file.close()
+        return None
+
+
+def start_background_warmup(job, lock_path):
+    """Run a warm-up job on a daemon thread if no other worker holds the lock"""
+    lock_file = acquire_startup_lock(lock_path)
+    if lock_file is None:
+        logging.info("Startup warm-up already running in another worker")
+        return None
+
+    def run():
+        try:
+            job.run()
+        except Exception as e:
+            logging.error(f"Startup warm-up failed: {e}")
+        finally:
+            lock_file.close()
+
+    thread = threading.Thread(target=run, name='warmup', daemon=True)
+    thread.start()
+    return thread